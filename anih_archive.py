@@ -0,0 +1,186 @@
+import os
+import json
+import datetime
+import threading
+from array import array
+from typing import Dict, Optional
+
+from anih_emotion import detect_emotion
+
+
+ANALYTICS_AVAILABLE = False
+
+try:
+    import numpy as np
+    ANALYTICS_AVAILABLE = True
+except:
+    pass
+
+
+COLUMNS = (
+    ("ts", "d"),
+    ("day", "i"),
+    ("hour", "B"),
+    ("user_chars", "I"),
+    ("reply_chars", "I"),
+    ("reply_words", "I"),
+    ("latency_ms", "f"),
+    ("emotion", "B"),
+    ("source", "B"),
+)
+
+EMOTIONS = ("neutral", "happy", "excited", "loving", "sad", "worried", "angry")
+SOURCES = ("groq", "ollama", "local", "cache")
+
+META_NAME = "meta.json"
+SCHEMA_VERSION = 1
+
+
+class ColumnArchive:
+    """
+    Append-only per-turn metadata, one raw binary file per column
+
+    Every turn adds one fixed-size value to each column file, so writing
+    needs no numpy and no rewrite, and reading a column is a single
+    np.fromfile. Raw text never goes in here. If a crash leaves columns
+    with different lengths, opening the archive cuts them all back to the
+    shortest so later rows line up again.
+    """
+    
+    def __init__(self, folder: str):
+        self.folder = folder
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        
+        meta_path = os.path.join(folder, META_NAME)
+        if not os.path.exists(meta_path):
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "version": SCHEMA_VERSION,
+                    "columns": dict(COLUMNS),
+                    "emotions": EMOTIONS,
+                    "sources": SOURCES
+                }, f, indent=2)
+        self._heal()
+    
+    def _path(self, name: str) -> str:
+        return os.path.join(self.folder, f"{name}.col")
+    
+    def __len__(self) -> int:
+        lengths = []
+        for name, code in COLUMNS:
+            path = self._path(name)
+            lengths.append(os.path.getsize(path) // array(code).itemsize if os.path.exists(path) else 0)
+        return min(lengths)
+    
+    def _heal(self):
+        """Truncate every column to the rows all of them hold (after a partial append)"""
+        rows = len(self)
+        for name, code in COLUMNS:
+            path = self._path(name)
+            size = rows * array(code).itemsize
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+    
+    def append(self, when: datetime.datetime, user_text: str, reply: str, latency_ms: Optional[float] = None,
+               source: str = "groq"):
+        """Record one turn (only sizes, timing and the reply's mood are kept)"""
+        emotion = detect_emotion(reply)
+        row = {
+            "ts": when.timestamp(),
+            "day": when.toordinal(),
+            "hour": when.hour,
+            "user_chars": len(user_text),
+            "reply_chars": len(reply),
+            "reply_words": len(reply.split()),
+            "latency_ms": float("nan") if latency_ms is None else latency_ms,
+            "emotion": EMOTIONS.index(emotion) if emotion in EMOTIONS else 0,
+            "source": SOURCES.index(source) if source in SOURCES else 0,
+        }
+        with self._lock:
+            try:
+                for name, code in COLUMNS:
+                    with open(self._path(name), 'ab') as f:
+                        array(code, [row[name]]).tofile(f)
+            except BaseException:
+                self._heal()
+                raise
+    
+    def load(self) -> Dict:
+        """Every column as a numpy array, all the same length"""
+        if not ANALYTICS_AVAILABLE:
+            raise RuntimeError("Insights need: pip install numpy")
+        with self._lock:
+            columns = {
+                name: np.fromfile(self._path(name), dtype=np.dtype(code)) if os.path.exists(self._path(name))
+                else np.empty(0, dtype=np.dtype(code))
+                for name, code in COLUMNS
+            }
+        rows = min(len(values) for values in columns.values())
+        return {name: values[:rows] for name, values in columns.items()}
+    
+    def insights(self, today: Optional[datetime.date] = None) -> Dict:
+        """Usage aggregates over the whole archive"""
+        columns = self.load()
+        turns = len(columns["ts"])
+        if not turns:
+            return {"turns": 0}
+        
+        today = (today or datetime.date.today()).toordinal()
+        days, per_day = np.unique(columns["day"], return_counts=True)
+        week = columns["day"][(columns["day"] > today - 7) & (columns["day"] <= today)]
+        recent = np.bincount(today - week, minlength=7)[::-1]
+        
+        latency = columns["latency_ms"]
+        latency = latency[~np.isnan(latency)]
+        reply_chars = columns["reply_chars"]
+        
+        return {
+            "turns": turns,
+            "first": datetime.date.fromordinal(int(days[0])),
+            "days_active": len(days),
+            "per_day_mean": float(per_day.mean()),
+            "per_day_max": int(per_day.max()),
+            "busiest_day": datetime.date.fromordinal(int(days[per_day.argmax()])),
+            "last_7_days": recent.tolist(),
+            "reply_chars_mean": float(reply_chars.mean()),
+            "reply_chars_p50": float(np.percentile(reply_chars, 50)),
+            "reply_chars_p95": float(np.percentile(reply_chars, 95)),
+            "reply_words_mean": float(columns["reply_words"].mean()),
+            "user_chars_mean": float(columns["user_chars"].mean()),
+            "latency_p50": float(np.percentile(latency, 50)) if len(latency) else None,
+            "latency_p95": float(np.percentile(latency, 95)) if len(latency) else None,
+            "hours": np.bincount(columns["hour"], minlength=24).tolist(),
+            "emotions": dict(zip(EMOTIONS, np.bincount(columns["emotion"], minlength=len(EMOTIONS)).tolist())),
+            "sources": dict(zip(SOURCES, np.bincount(columns["source"], minlength=len(SOURCES)).tolist())),
+        }
+    
+    def format_insights(self) -> str:
+        """Human readable insights() for /insights"""
+        stats = self.insights()
+        turns = stats["turns"]
+        if not turns:
+            return "No turns archived yet."
+        
+        lines = [
+            f"Turns: {turns} over {stats['days_active']} active days since {stats['first']}",
+            f"Per active day: {stats['per_day_mean']:.1f} avg, {stats['per_day_max']} max ({stats['busiest_day']})",
+            f"Last 7 days: {' '.join(str(count) for count in stats['last_7_days'])}  (oldest -> today)",
+            f"Her replies: {stats['reply_chars_mean']:.0f} chars avg, p50 {stats['reply_chars_p50']:.0f}, "
+            f"p95 {stats['reply_chars_p95']:.0f} ({stats['reply_words_mean']:.0f} words)",
+            f"Your messages: {stats['user_chars_mean']:.0f} chars avg",
+        ]
+        if stats["latency_p50"] is not None:
+            lines.append(f"Reply latency: p50 {stats['latency_p50']:.0f} ms, p95 {stats['latency_p95']:.0f} ms")
+        
+        lines.append("Moods: " + ", ".join(f"{emotion} {count * 100 // turns}%"
+                                           for emotion, count in sorted(stats["emotions"].items(), key=lambda item: -item[1])
+                                           if count))
+        lines.append("Answered by: " + ", ".join(f"{source} {count}" for source, count in stats["sources"].items() if count))
+        
+        peak = max(stats["hours"]) or 1
+        lines.append("Hours of activity:")
+        for hour, count in enumerate(stats["hours"]):
+            if count:
+                lines.append(f"  {hour:02d}:00 {'█' * max(1, count * 30 // peak)} {count}")
+        return "\n".join(lines)
@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import shutil
+import asyncio
+import argparse
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from anih_loader import load_anih
+from anih_metrics import FALLBACKS, PROVIDER_ERRORS, watch
+from anih_ratelimit import TokenBucket, background
+
+
+BATCH_CONCURRENCY = 4
+PROMPT_FIELDS = ("prompt", "input", "text", "user", "body")
+ID_FIELDS = ("id", "request_id")
+SNAPSHOT_FILES = ("anih_memory.json", "anih_conversations.json")
+PROGRESS_EVERY = 25
+
+
+def read_items(path: str, field: Optional[str] = None) -> Iterator[Tuple[str, str]]:
+    """(id, prompt) for every usable line - plain strings or objects with a prompt field"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                print(f"⚠️ {path}:{number} is not JSON, skipped")
+                continue
+            if isinstance(item, str):
+                yield str(number), item
+                continue
+            if not isinstance(item, dict):
+                continue
+            
+            item_id = next((str(item[key]) for key in ID_FIELDS if item.get(key) is not None), str(number))
+            prompt = item.get(field) if field else next((item[key] for key in PROMPT_FIELDS if item.get(key)), None)
+            if isinstance(prompt, str) and prompt.strip():
+                yield item_id, prompt
+            else:
+                print(f"⚠️ {path}:{number} has no prompt, skipped")
+
+
+def completed_ids(path: str) -> Set[str]:
+    """Ids already answered in an earlier run's output (failed items are retried)"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "error" not in record:
+                done.add(str(record.get("id")))
+    return done
+
+
+def snapshot_data_dir(run_dir: str, source_dir: Optional[str]):
+    """Copy memory and history into the run's own data dir, once - later runs resume from it"""
+    if os.path.isdir(run_dir):
+        return
+    os.makedirs(run_dir)
+    if not source_dir:
+        return
+    for name in SNAPSHOT_FILES:
+        source = os.path.join(source_dir, name)
+        if os.path.exists(source):
+            shutil.copy2(source, os.path.join(run_dir, name))
+
+
+class BatchRunner:
+    """
+    Answers a JSONL file of prompts without the REPL
+
+    Every prompt goes through the LLM path against the same memory and
+    history snapshot, so items are independent and can run concurrently.
+    With stateful=True they are played as consecutive turns instead (one
+    at a time, history and memory grow like a real session). Results are
+    appended to the output as they finish, one JSON line each, so an
+    interrupted run resumes by skipping the ids already there.
+    """
+    
+    def __init__(self, anih, out_path: str, concurrency: int = BATCH_CONCURRENCY, stateful: bool = False):
+        self.anih = anih
+        self.out_path = out_path
+        self.stateful = stateful
+        self.concurrency = 1 if stateful else max(1, concurrency)
+        if not stateful:
+            anih.reuse_ollama_context = False
+        self.latencies = []
+        self.errors = 0
+        self.skipped = 0
+        self._out = None
+    
+    async def _answer(self, prompt: str) -> Tuple[str, list]:
+        """The reply plus the provider failures behind it (error text and canned replies are not answers)"""
+        with background(), watch() as events:
+            if self.stateful:
+                reply = await self.anih.achat(prompt)
+            else:
+                reply = await self.anih.aget_ai_response(prompt)
+        failures = []
+        for name, labels in events:
+            if name == PROVIDER_ERRORS.name:
+                failures.append(f"{labels.get('provider')} {labels.get('kind')}")
+            elif name == FALLBACKS.name:
+                failures.append("fallback reply")
+        return reply, failures
+    
+    async def _run_one(self, item_id: str, prompt: str):
+        record = {"id": item_id, "prompt": prompt, "started": time.time()}
+        start = time.perf_counter()
+        try:
+            reply, failures = await self._answer(prompt)
+            if failures:
+                record["error"] = "provider failure: " + ", ".join(failures)
+            else:
+                record["response"] = reply
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        if "error" in record:
+            self.errors += 1
+        elapsed = time.perf_counter() - start
+        record["latency_ms"] = round(elapsed * 1000, 1)
+        record["backend"] = self.anih._backend()
+        if "error" not in record:
+            self.latencies.append(elapsed)
+        
+        self._out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._out.flush()
+        
+        finished = len(self.latencies) + self.errors
+        if finished % PROGRESS_EVERY == 0:
+            print(f"   ... {finished} done, {self.errors} errors")
+    
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            await self._run_one(*item)
+    
+    async def run(self, items: Iterator[Tuple[str, str]]) -> Dict:
+        done = completed_ids(self.out_path)
+        started = time.perf_counter()
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        self._out = open(self.out_path, 'a+', encoding='utf-8')
+        if self._out.tell():
+            self._out.seek(self._out.tell() - 1)
+            if self._out.read(1) != "\n":
+                self._out.write("\n")
+        try:
+            workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)]
+            for item_id, prompt in items:
+                if item_id in done:
+                    self.skipped += 1
+                    continue
+                await queue.put((item_id, prompt))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            self._out.close()
+        
+        return {
+            "answered": len(self.latencies),
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "seconds": time.perf_counter() - started,
+            "latencies": self.latencies,
+        }
+    
+    def format_summary(self, results: Dict) -> str:
+        lines = [f"📦 {results['answered']} answered, {results['errors']} errors, "
+                 f"{results['skipped']} already done, in {results['seconds']:.1f}s"]
+        latencies = sorted(results["latencies"])
+        if latencies:
+            def pct(p):
+                return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1000
+            lines.append(f"   latency p50 {pct(50):.0f} ms, p95 {pct(95):.0f} ms, max {latencies[-1] * 1000:.0f} ms, "
+                         f"{len(latencies) / max(results['seconds'], 1e-9):.1f} items/s")
+        lines.append(f"   results: {self.out_path}")
+        return "\n".join(lines)
+
+
+async def arun_batch(core, args) -> Dict:
+    run_dir = args.data_dir or os.path.splitext(args.out)[0] + "_data"
+    snapshot_data_dir(run_dir, None if args.fresh else core.ANIH_DATA_DIR)
+    
+    core.GROQ_LIMITER.max_wait = None
+    if args.rpm:
+        core.GROQ_LIMITER.requests = TokenBucket(args.rpm)
+    if args.tpm:
+        core.GROQ_LIMITER.tokens = TokenBucket(args.tpm)
+    
+    anih = core.AnihAI(data_dir=run_dir, enable_voice=False)
+    runner = BatchRunner(anih, args.out, concurrency=args.concurrency, stateful=args.stateful)
+    print(f"📦 Batch {args.batch} -> {args.out} ({runner.concurrency} at a time, data in {run_dir})")
+    try:
+        results = await runner.run(read_items(args.batch, args.field))
+    finally:
+        await core.aio_close()
+    print(runner.format_summary(results))
+    return results
+
+
+def main(core=None, argv=None):
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of prompts without the REPL")
+    parser.add_argument("--batch", required=True, help="input JSONL: strings or objects with a prompt field")
+    parser.add_argument("--out", required=True, help="output JSONL, appended to and resumed from")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--field", default=None, help=f"prompt field (default: first of {', '.join(PROMPT_FIELDS)})")
+    parser.add_argument("--stateful", action="store_true", help="play the prompts as one conversation, in order")
+    parser.add_argument("--data-dir", default=None, help="memory / history for this run (default: <out>_data)")
+    parser.add_argument("--fresh", action="store_true", help="start from empty memory instead of a snapshot")
+    parser.add_argument("--rpm", type=float, default=None, help="Groq requests per minute for this run")
+    parser.add_argument("--tpm", type=float, default=None, help="Groq tokens per minute for this run")
+    args, _ = parser.parse_known_args(argv)
+    return asyncio.run(arun_batch(core or load_anih(), args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+import os
+import io
+import json
+import time
+import random
+import shutil
+import base64
+import argparse
+import tempfile
+import threading
+import contextlib
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from anih_loader import load_anih
+from anih_ratelimit import RateLimiter
+from anih_trace import percentile
+
+
+STAGES = ["prompt", "llm", "persist", "learn", "tts", "image", "turn"]
+
+SCRIPT = [
+    "hi",
+    "how are you today?",
+    "I finally fixed that memory leak in my side project, took me all night",
+    "what are you doing right now",
+    "I love the new season of that anime we were watching",
+    "my boss wants the report by friday and I haven't even started",
+    "do you think I should learn rust or go next?",
+    "miss you",
+    "I'm thinking about going to the gym after work",
+    "tell me something about your project",
+    "lol you're weird",
+    "I prefer coffee over tea, always have",
+    "bye",
+]
+
+TINY_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+)
+
+FAKE_MP3 = b"\xff\xf3\x44\xc4" + bytes(2048)
+
+
+class StubConfig:
+    """Latency and failure injection for one stub service"""
+    
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+    
+    def delay(self):
+        wait = self.latency + random.uniform(0, self.jitter)
+        if wait > 0:
+            time.sleep(wait)
+    
+    def should_fail(self) -> bool:
+        return random.random() < self.failure_rate
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Local stand-ins for Groq (OpenAI chat API, plain and SSE), Ollama
+    /api/generate, SD WebUI txt2img, Pollinations and a TTS endpoint
+    """
+    
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    services: Dict[str, StubConfig] = {}
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+    
+    def _send(self, status: int, body: bytes, content_type: str = "application/json", headers: Optional[Dict] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_json(self, status: int, data: Dict, headers: Optional[Dict] = None):
+        self._send(status, json.dumps(data).encode("utf-8"), headers=headers)
+    
+    def _inject(self, service: str) -> bool:
+        """Apply latency, then maybe answer with an injected error"""
+        config = self.services.get(service, StubConfig())
+        config.delay()
+        if config.should_fail():
+            if random.random() < 0.5:
+                self._send_json(429, {"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_exceeded"}},
+                                headers={"retry-after": "1"})
+            else:
+                self._send_json(500, {"error": {"message": "Injected failure (stub)", "type": "server_error"}})
+            return True
+        return False
+    
+    def do_POST(self):
+        payload = self._read_json()
+        
+        if self.path.endswith("/chat/completions"):
+            if self._inject("llm"):
+                return
+            user_line = payload.get("messages", [{}])[-1].get("content", "")
+            reply = f"mhm. you said '{user_line[:40]}'. anyway, what are you up to?"
+            if payload.get("stream"):
+                self._stream_chat(payload.get("model", "stub"), reply)
+            else:
+                self._send_json(200, {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "model": payload.get("model", "stub"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": len(json.dumps(payload)) // 4, "completion_tokens": len(reply) // 4},
+                }, headers={
+                    "x-ratelimit-remaining-requests": "999",
+                    "x-ratelimit-remaining-tokens": "99999",
+                })
+        
+        elif self.path == "/api/generate":
+            if self._inject("llm"):
+                return
+            self._send_json(200, {
+                "model": payload.get("model", "stub"),
+                "response": "" if not payload.get("prompt") else "yeah yeah. what's up?",
+                "done": True,
+                "context": list(range(16)),
+            })
+        
+        elif self.path == "/sdapi/v1/txt2img":
+            if self._inject("image"):
+                return
+            self._send_json(200, {"images": [base64.b64encode(TINY_PNG).decode("ascii")]})
+        
+        elif self.path == "/tts":
+            if self._inject("tts"):
+                return
+            self._send(200, FAKE_MP3, content_type="audio/mpeg")
+        
+        else:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+    
+    def do_GET(self):
+        if self.path.startswith("/prompt/"):
+            if self._inject("image"):
+                return
+            self._send(200, TINY_PNG, content_type="image/png")
+        else:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+    
+    def _stream_chat(self, model: str, reply: str):
+        """OpenAI style server-sent events, one word per chunk"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for word in reply.split(" "):
+            chunk = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def start_stub_server(services: Dict[str, StubConfig], port: int = 0):
+    """Start the stub services on localhost, returns (server, base_url)"""
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"services": services})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="anih-bench-stub", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class StubVoice:
+    """Stands in for AnihVoice: one HTTP round trip to the stub TTS per reply"""
+    
+    def __init__(self, base_url: str):
+        import requests
+        self.url = f"{base_url}/tts"
+        self.session = requests.Session()
+    
+    def speak(self, text: str, play_audio: bool = True, save_file: bool = True,
+              audio: Optional[bytes] = None) -> Optional[str]:
+        if audio is not None:
+            return None
+        response = self.session.post(self.url, json={"text": text}, timeout=30)
+        response.raise_for_status()
+        return None
+
+
+def _timed(turn: Dict[str, float], stage: str, fn):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            turn[stage] += time.perf_counter() - start
+    return wrapper
+
+
+def run_benchmark(turns: int = 300, backend: str = "groq", image_every: int = 0,
+                  services: Optional[Dict[str, StubConfig]] = None, anih_module=None) -> Dict:
+    """
+    Drive a scripted session through AnihAI.chat against local stubs
+
+    Returns per-stage latency samples (seconds) plus error counts
+    """
+    services = services or {"llm": StubConfig(), "tts": StubConfig(), "image": StubConfig()}
+    server, base_url = start_stub_server(services)
+    anih_module = anih_module or load_anih()
+    workdir = tempfile.mkdtemp(prefix="anih_bench_")
+    previous_cwd = os.getcwd()
+    
+    overrides = {
+        "ANIH_DATA_DIR": workdir,
+        "MEMORY_FILE": os.path.join(workdir, "anih_memory.json"),
+        "CONVERSATION_HISTORY_FILE": os.path.join(workdir, "anih_conversations.json"),
+        "EXAMPLES_FOLDER": os.path.join(workdir, "examples"),
+        "LORA_OUTPUT_DIR": os.path.join(workdir, "anih_lora_model"),
+        "ENABLE_VOICE": False,
+        "USE_GROQ": backend == "groq",
+        "GROQ_API_KEY": "gsk_bench_stub_key",
+        "GROQ_API_URL": f"{base_url}/openai/v1/chat/completions",
+        "OLLAMA_API_URL": f"{base_url}/api/generate",
+        "POLLINATIONS_URL": f"{base_url}/prompt/",
+        "SD_WEBUI_URL": f"{base_url}/sdapi/v1/txt2img",
+        "GROQ_LIMITER": RateLimiter(),
+        "GROQ_MAX_RETRIES": 0,
+    }
+    for name, value in overrides.items():
+        setattr(anih_module, name, value)
+    
+    samples = defaultdict(list)
+    errors = 0
+    quiet = io.StringIO()
+    
+    try:
+        os.chdir(workdir)
+        with contextlib.redirect_stdout(quiet):
+            anih = anih_module.AnihAI()
+            anih.voice = StubVoice(base_url)
+            anih.custom_model_available = True
+        
+        turn = defaultdict(float)
+        anih.build_system_prompt = _timed(turn, "prompt", anih.build_system_prompt)
+        anih.get_ai_response = _timed(turn, "llm", anih.get_ai_response)
+        anih.save_conversation_history = _timed(turn, "persist", anih.save_conversation_history)
+        anih.learn_from_interaction = _timed(turn, "learn", anih.learn_from_interaction)
+        anih.voice.speak = _timed(turn, "tts", anih.voice.speak)
+        
+        for i in range(turns):
+            turn.clear()
+            line = SCRIPT[i % len(SCRIPT)]
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(quiet):
+                try:
+                    if image_every and i and i % image_every == 0:
+                        anih.generate_image(f"anih at her desk, scene {i}")
+                        samples["image"].append(time.perf_counter() - start)
+                        continue
+                    response = anih.chat(line)
+                    if "Error" in response or "error" in response:
+                        errors += 1
+                except Exception:
+                    errors += 1
+            samples["turn"].append(time.perf_counter() - start)
+            samples["llm"].append(turn["llm"] - turn["prompt"])
+            for stage in ("prompt", "persist", "learn", "tts"):
+                samples[stage].append(turn[stage])
+            quiet.seek(0)
+            quiet.truncate()
+    finally:
+        os.chdir(previous_cwd)
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    return {"turns": turns, "backend": backend, "errors": errors, "samples": dict(samples)}
+
+
+def summarize(results: Dict) -> Dict:
+    """p50/p95/p99/max per stage in milliseconds"""
+    summary = {}
+    for stage in STAGES:
+        values = results["samples"].get(stage)
+        if not values:
+            continue
+        summary[stage] = {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(max(values) * 1000, 2),
+        }
+    return summary
+
+
+def format_summary(results: Dict, summary: Dict) -> str:
+    lines = [
+        f"📊 {results['turns']} turns via {results['backend']} stub, {results['errors']} error replies",
+        f"{'stage':<10}{'count':>8}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}{'max ms':>12}",
+    ]
+    for stage, row in summary.items():
+        lines.append(f"{stage:<10}{row['count']:>8}{row['p50_ms']:>12.2f}{row['p95_ms']:>12.2f}"
+                     f"{row['p99_ms']:>12.2f}{row['max_ms']:>12.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline turn-latency benchmark for Anih")
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--backend", choices=["groq", "ollama"], default="groq")
+    parser.add_argument("--image-every", type=int, default=0, help="run /image every N turns (0 = never)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds")
+    parser.add_argument("--tts-latency", type=float, default=0.02, help="seconds")
+    parser.add_argument("--image-latency", type=float, default=0.2, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="0..1, applied to every stub")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", dest="json_out", default=None, help="write the summary to this file")
+    args = parser.parse_args(argv)
+    
+    if args.seed is not None:
+        random.seed(args.seed)
+    
+    services = {
+        "llm": StubConfig(args.llm_latency, args.jitter, args.failure_rate),
+        "tts": StubConfig(args.tts_latency, args.jitter, args.failure_rate),
+        "image": StubConfig(args.image_latency, args.jitter, args.failure_rate),
+    }
+    results = run_benchmark(args.turns, args.backend, args.image_every, services)
+    summary = summarize(results)
+    print(format_summary(results, summary))
+    
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump({"turns": results["turns"], "backend": results["backend"],
+                       "errors": results["errors"], "stages": summary}, f, indent=2)
+        print(f"\n💾 Results saved: {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
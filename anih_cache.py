@@ -0,0 +1,129 @@
+import re
+import time
+import queue
+import random
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+
+_REPEATS = re.compile(r'(.)\1{2,}')
+_NON_WORD = re.compile(r"[^\w\s']+")
+
+
+def normalize(text: str) -> str:
+    """'Heyyy!! 💜' and 'hey' share a key"""
+    text = _NON_WORD.sub(" ", text.lower())
+    text = _REPEATS.sub(r'\1', text)
+    return " ".join(text.split())
+
+
+class CachedReply:
+    __slots__ = ("text", "audio", "served")
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.audio = None
+        self.served = 0
+
+
+class ResponseCache:
+    """
+    Short replies to short openers, kept per (normalized input, fingerprint)
+
+    Each key collects up to `variants` real LLM replies before it starts
+    answering from the cache, then rotates through them (never the same one
+    twice in a row) and still refreshes one now and then so the set keeps
+    changing. Keys expire after ttl seconds and the least recently used key
+    goes when the cache is full. If a renderer is given, every stored
+    variant gets its audio synthesized in the background.
+    """
+    
+    def __init__(self, max_keys: int = 256, variants: int = 4, ttl: float = 6 * 3600,
+                 refresh_rate: float = 0.15, max_words: int = 4, renderer: Optional[Callable] = None):
+        self.max_keys = max_keys
+        self.variants = variants
+        self.ttl = ttl
+        self.refresh_rate = refresh_rate
+        self.max_words = max_words
+        self.renderer = renderer
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._render_queue = queue.Queue()
+        self._render_thread = None
+    
+    def key(self, text: str, fingerprint: str) -> Optional[str]:
+        """Cache key, or None when the input is too long to be an opener"""
+        normalized = normalize(text)
+        if not normalized or len(normalized.split()) > self.max_words:
+            return None
+        return f"{normalized}|{fingerprint}"
+    
+    def get(self, key: str) -> Optional[CachedReply]:
+        """A variant to serve, or None if the LLM should answer (and be stored)"""
+        now = time.time()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if now - entry["created"] > self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            
+            replies: List[CachedReply] = entry["replies"]
+            if len(replies) < self.variants or random.random() < self.refresh_rate:
+                return None
+            
+            candidates = [reply for reply in replies if reply is not entry["last"]] or replies
+            reply = min(candidates, key=lambda r: (r.served, random.random()))
+            reply.served += 1
+            entry["last"] = reply
+            return reply
+    
+    def put(self, key: str, text: str):
+        """Store a fresh LLM reply as one of the key's variants"""
+        reply = CachedReply(text)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or time.time() - entry["created"] > self.ttl:
+                entry = self.entries[key] = {"created": time.time(), "replies": [], "last": None}
+            self.entries.move_to_end(key)
+            
+            replies = entry["replies"]
+            if any(existing.text == text for existing in replies):
+                return
+            if len(replies) >= self.variants:
+                replies.remove(max(replies, key=lambda r: r.served))
+            replies.append(reply)
+            
+            while len(self.entries) > self.max_keys:
+                self.entries.popitem(last=False)
+        
+        if self.renderer is not None:
+            self._render(reply)
+    
+    def _render(self, reply: CachedReply):
+        with self._lock:
+            if self._render_thread is None:
+                self._render_thread = threading.Thread(target=self._render_worker, name="anih-cache-render", daemon=True)
+                self._render_thread.start()
+        self._render_queue.put(reply)
+    
+    def _render_worker(self):
+        while True:
+            reply = self._render_queue.get()
+            try:
+                reply.audio = self.renderer(reply.text)
+            except Exception as e:
+                print(f"⚠️ Could not pre-render cached reply: {e}")
+    
+    def stats(self) -> Dict:
+        """Keys, stored variants and how many have audio ready"""
+        with self._lock:
+            replies = [reply for entry in self.entries.values() for reply in entry["replies"]]
+        return {
+            "keys": len(self.entries),
+            "variants": len(replies),
+            "rendered": sum(1 for reply in replies if reply.audio is not None),
+        }
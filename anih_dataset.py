@@ -0,0 +1,301 @@
+import os
+import json
+import shutil
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+
+SCREENING_AVAILABLE = False
+
+try:
+    import numpy as np
+    from PIL import Image
+    SCREENING_AVAILABLE = True
+except:
+    pass
+
+
+IMAGE_PATTERNS = ("*.[jp][pn]g", "*.jpeg")
+MANIFEST_NAME = "dataset_manifest.json"
+QUARANTINE_DIR = "_quarantine"
+
+PHASH_SIZE = 32
+PHASH_LOW_FREQ = 8
+DUPLICATE_DISTANCE = 6
+MIN_SIDE = 512
+MIN_SHARPNESS = 60.0
+SHARPNESS_SIDE = 512
+
+_DCT_MATRIX = None
+
+
+def _dct_matrix(n: int):
+    """Orthonormal DCT-II basis, so dct2(x) = D @ x @ D.T"""
+    global _DCT_MATRIX
+    if _DCT_MATRIX is None or _DCT_MATRIX.shape[0] != n:
+        k = np.arange(n).reshape(-1, 1)
+        i = np.arange(n).reshape(1, -1)
+        matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+        matrix[0, :] = np.sqrt(1.0 / n)
+        _DCT_MATRIX = matrix
+    return _DCT_MATRIX
+
+
+def analyze_image(path: str) -> Dict:
+    """
+    Compute pHash, sharpness and resolution for one image
+    Runs inside worker processes, so it only touches its own file
+    """
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+            
+            img.draft("L", (SHARPNESS_SIDE, SHARPNESS_SIDE))
+            gray = img.convert("L")
+        
+        
+        gray.thumbnail((SHARPNESS_SIDE, SHARPNESS_SIDE))
+        pixels = np.asarray(gray, dtype=np.float32)
+        laplacian = (pixels[:-2, 1:-1] + pixels[2:, 1:-1] + pixels[1:-1, :-2]
+                     + pixels[1:-1, 2:] - 4.0 * pixels[1:-1, 1:-1])
+        sharpness = float(laplacian.var()) if laplacian.size else 0.0
+        
+        
+        small = np.asarray(gray.resize((PHASH_SIZE, PHASH_SIZE), Image.BILINEAR), dtype=np.float64)
+        dct = _dct_matrix(PHASH_SIZE)
+        coefficients = (dct @ small @ dct.T)[:PHASH_LOW_FREQ, :PHASH_LOW_FREQ].flatten()
+        bits = coefficients > np.median(coefficients[1:])
+        phash = np.packbits(bits).tobytes().hex()
+        
+        return {
+            "width": width,
+            "height": height,
+            "sharpness": round(sharpness, 2),
+            "phash": phash,
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def list_images(folder: str) -> List[Path]:
+    """All candidate training images in the folder (quarantine excluded)"""
+    seen = set()
+    for pattern in IMAGE_PATTERNS:
+        seen.update(Path(folder).glob(pattern))
+    return sorted(seen)
+
+
+def manifest_path(folder: str) -> str:
+    """<folder>_dataset_manifest.json next to the folder, so it never ships with the images"""
+    folder = os.path.normpath(os.path.abspath(folder))
+    return os.path.join(os.path.dirname(folder), f"{os.path.basename(folder)}_{MANIFEST_NAME}")
+
+
+def load_manifest(folder: str) -> Dict:
+    """Load cached screening results"""
+    path = manifest_path(folder)
+    if not os.path.exists(path):
+        path = os.path.join(folder, MANIFEST_NAME)
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                if isinstance(data, dict) and isinstance(data.get("images"), dict):
+                    return data
+    except Exception as e:
+        print(f"⚠️ Could not read dataset manifest: {e}")
+    return {"version": 1, "images": {}}
+
+
+def save_manifest(folder: str, manifest: Dict):
+    """Save screening results so unchanged images are never decoded twice"""
+    path = manifest_path(folder)
+    try:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        legacy = os.path.join(folder, MANIFEST_NAME)
+        if os.path.exists(legacy):
+            os.remove(legacy)
+    except Exception as e:
+        print(f"⚠️ Could not save dataset manifest: {e}")
+
+
+def _free_path(folder: str, name: str) -> str:
+    """folder/name, or folder/stem_N.ext when that is already taken"""
+    stem, ext = os.path.splitext(name)
+    path = os.path.join(folder, name)
+    number = 1
+    while os.path.exists(path):
+        path = os.path.join(folder, f"{stem}_{number}{ext}")
+        number += 1
+    return path
+
+
+def _popcount(values):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+    return table[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def find_duplicate_groups(names: List[str], hashes: List[str], max_distance: int = DUPLICATE_DISTANCE) -> List[List[str]]:
+    """Group images whose pHashes are within max_distance bits of each other"""
+    if len(names) < 2:
+        return []
+    
+    values = np.array([int(h, 16) for h in hashes], dtype=np.uint64)
+    parent = list(range(len(names)))
+    
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    for i in range(len(values) - 1):
+        distances = _popcount(np.bitwise_xor(values[i + 1:], values[i]))
+        for j in np.nonzero(distances <= max_distance)[0]:
+            root_a, root_b = find(i), find(i + 1 + int(j))
+            if root_a != root_b:
+                parent[root_b] = root_a
+    
+    groups = {}
+    for i, name in enumerate(names):
+        groups.setdefault(find(i), []).append(name)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def screen_dataset(folder: str, quarantine: bool = False, workers: Optional[int] = None) -> Dict:
+    """
+    Screen the examples folder before packing it for training
+
+    Returns a report with duplicate groups, low quality files and the
+    number of clean images. Results are cached in the dataset manifest.
+    """
+    if not SCREENING_AVAILABLE:
+        raise RuntimeError("Dataset screening needs: pip install numpy pillow")
+    
+    manifest = load_manifest(folder)
+    cached = manifest["images"]
+    images = list_images(folder)
+    
+    entries = {}
+    pending = []
+    for path in images:
+        stat = path.stat()
+        entry = cached.get(path.name)
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            entries[path.name] = entry
+        else:
+            pending.append((path, stat))
+    
+    if pending:
+        paths = [str(path) for path, _ in pending]
+        if len(paths) < 16:
+            results = [analyze_image(p) for p in paths]
+        else:
+            workers = workers or os.cpu_count() or 1
+            chunksize = max(1, len(paths) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(analyze_image, paths, chunksize=chunksize))
+        
+        for (path, stat), result in zip(pending, results):
+            result["size"] = stat.st_size
+            result["mtime_ns"] = stat.st_mtime_ns
+            entries[path.name] = result
+    
+    low_quality = []
+    hashed = []
+    for name, entry in entries.items():
+        reasons = []
+        entry.pop("duplicate_of", None)
+        if entry.get("error"):
+            reasons.append(f"unreadable ({entry['error']})")
+        else:
+            if min(entry["width"], entry["height"]) < MIN_SIDE:
+                reasons.append(f"low resolution {entry['width']}x{entry['height']}")
+            if entry["sharpness"] < MIN_SHARPNESS:
+                reasons.append(f"blurry (sharpness {entry['sharpness']:.0f})")
+            hashed.append(name)
+        entry["status"] = "low_quality" if reasons else "ok"
+        if reasons:
+            low_quality.append((name, reasons))
+    
+    def quality(name):
+        entry = entries[name]
+        return (entry["status"] == "ok", entry["width"] * entry["height"], entry["sharpness"])
+    
+    duplicates = []
+    for group in find_duplicate_groups(hashed, [entries[n]["phash"] for n in hashed]):
+        group.sort(key=quality, reverse=True)
+        duplicates.append((group[0], group[1:]))
+        for name in group[1:]:
+            if entries[name]["status"] == "ok":
+                entries[name]["status"] = "duplicate"
+            entries[name]["duplicate_of"] = group[0]
+    
+    quarantined = []
+    if quarantine:
+        quarantine_path = os.path.join(folder, QUARANTINE_DIR)
+        for name, entry in list(entries.items()):
+            if entry["status"] != "ok":
+                os.makedirs(quarantine_path, exist_ok=True)
+                shutil.move(os.path.join(folder, name), _free_path(quarantine_path, name))
+                quarantined.append(name)
+                del entries[name]
+    
+    manifest["images"] = entries
+    save_manifest(folder, manifest)
+    
+    return {
+        "total": len(images),
+        "analyzed": len(pending),
+        "cached": len(images) - len(pending),
+        "duplicates": duplicates,
+        "low_quality": low_quality,
+        "clean": sum(1 for entry in entries.values() if entry["status"] == "ok"),
+        "quarantined": quarantined,
+    }
+
+
+def format_report(report: Dict, folder: str) -> str:
+    """Human readable screening summary"""
+    lines = [
+        f"📊 Screened {report['total']} images "
+        f"({report['analyzed']} analyzed, {report['cached']} from manifest)",
+        f"   ✅ Clean: {report['clean']}",
+    ]
+    
+    if report["duplicates"]:
+        count = sum(len(dups) for _, dups in report["duplicates"])
+        lines.append(f"   🔁 Duplicates / near-duplicates: {count}")
+        for keep, dups in report["duplicates"][:10]:
+            lines.append(f"      keep {keep} <- {', '.join(dups)}")
+    
+    if report["low_quality"]:
+        lines.append(f"   ⚠️ Low quality: {len(report['low_quality'])}")
+        for name, reasons in report["low_quality"][:10]:
+            lines.append(f"      {name}: {', '.join(reasons)}")
+    
+    if report["quarantined"]:
+        lines.append(f"   📦 Moved {len(report['quarantined'])} files to {os.path.join(folder, QUARANTINE_DIR)}/")
+    elif report["duplicates"] or report["low_quality"]:
+        lines.append("   Set QUARANTINE_BAD_EXAMPLES = True (or run: python anih_dataset.py --quarantine) to move them out")
+    
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    folder = args[0] if args else "examples"
+    
+    start = time.perf_counter()
+    report = screen_dataset(folder, quarantine="--quarantine" in sys.argv)
+    print(format_report(report, folder))
+    print(f"\n⏱️ Done in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,32 @@
+def detect_emotion(text: str) -> str:
+    """
+    Detect emotion from text for voice modulation
+    Returns: excited, happy, sad, loving, worried, angry, neutral
+    """
+    text_lower = text.lower()
+    
+    
+    if any(word in text_lower for word in ['!!!', 'amazing', 'awesome', 'finally', 'yes!', 'yay']):
+        return "excited"
+    
+    
+    if any(word in text_lower for word in ['love you', 'my everything', 'prabhas', 'devoted', '💜', '💕']):
+        return "loving"
+    
+    
+    if any(word in text_lower for word in ['miss', 'leaving', 'alone', '💔', 'sad', 'cry']):
+        return "sad"
+    
+    
+    if any(word in text_lower for word in ['worried', 'scared', 'please', 'need you', 'help']):
+        return "worried"
+    
+    
+    if any(word in text_lower for word in ['angry', 'frustrated', 'hate', 'annoying']):
+        return "angry"
+    
+    
+    if any(word in text_lower for word in ['happy', 'great', 'good', 'wonderful']):
+        return "happy"
+    
+    return "neutral"
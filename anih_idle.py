@@ -0,0 +1,159 @@
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from typing import Callable, Optional
+
+from anih_trace import TRACER
+
+
+FLUSH = 0
+MAINTENANCE = 5
+WARMUP = 8
+KEEPALIVE = 9
+
+
+class IdleScheduler:
+    """
+    Runs deferrable work while the user is thinking
+
+    The REPL calls idle() while it waits for input and busy() as soon as a
+    line arrives. Work only starts after `grace` seconds of idleness, lower
+    priority numbers first, one task at a time on a daemon thread. A task
+    that is already running finishes (tasks are kept small, long ones
+    check should_yield()), nothing new starts until the next idle spell.
+    """
+    
+    def __init__(self, grace: float = 0.3, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.grace = grace
+        self.loop = loop
+        self.stats = {}
+        self.busy_seconds = 0.0
+        self.current = None
+        self._queue = []
+        self._keys = {}
+        self._periodic = []
+        self._seq = itertools.count()
+        self._idle_since = None
+        self._cond = threading.Condition()
+        self._running = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="anih-idle", daemon=True)
+        self._thread.start()
+    
+    def submit(self, name: str, fn: Callable, priority: int = MAINTENANCE, key: Optional[str] = None):
+        """Queue fn() for the next idle spell (a pending task with the same key is kept instead)"""
+        with self._cond:
+            if key is not None and key in self._keys:
+                return
+            entry = [priority, next(self._seq), name, fn, key]
+            heapq.heappush(self._queue, entry)
+            if key is not None:
+                self._keys[key] = entry
+            self._cond.notify_all()
+    
+    def every(self, name: str, fn: Callable, interval: float, priority: int = KEEPALIVE):
+        """Run fn() at most every interval seconds, only while idle"""
+        with self._cond:
+            self._periodic.append([name, fn, interval, priority, time.monotonic() + interval])
+            self._cond.notify_all()
+    
+    def idle(self):
+        with self._cond:
+            if self._idle_since is None:
+                self._idle_since = time.monotonic()
+            self._cond.notify_all()
+    
+    def busy(self):
+        with self._cond:
+            self._idle_since = None
+    
+    def should_yield(self) -> bool:
+        """True once interactive work is back - long tasks should stop early"""
+        return self._idle_since is None
+    
+    def depth(self) -> int:
+        return len(self._queue)
+    
+    def _due(self, now: float):
+        for periodic in self._periodic:
+            name, fn, interval, priority, due = periodic
+            if due <= now and name not in self._keys:
+                periodic[4] = now + interval
+                entry = [priority, next(self._seq), name, fn, name]
+                heapq.heappush(self._queue, entry)
+                self._keys[name] = entry
+    
+    def _next(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = 1.0
+                if self._idle_since is not None:
+                    ready_at = self._idle_since + self.grace
+                    if now >= ready_at:
+                        self._due(now)
+                        if self._queue:
+                            entry = heapq.heappop(self._queue)
+                            self._keys.pop(entry[4], None)
+                            self.current = entry[2]
+                            return entry
+                    else:
+                        wait = ready_at - now
+                self._cond.wait(wait)
+    
+    def _on_loop_thread(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+    
+    def _execute(self, name: str, fn: Callable):
+        with self._running:
+            start = time.perf_counter()
+            stats = self.stats.setdefault(name, {"runs": 0, "seconds": 0.0, "errors": 0})
+            try:
+                result = fn()
+                if asyncio.iscoroutine(result):
+                    if self.loop is None or self.loop.is_closed() or self._on_loop_thread():
+                        result.close()
+                    else:
+                        asyncio.run_coroutine_threadsafe(result, self.loop).result()
+            except Exception as e:
+                stats["errors"] += 1
+                stats["last_error"] = str(e)
+            finally:
+                elapsed = time.perf_counter() - start
+                stats["runs"] += 1
+                stats["seconds"] += elapsed
+                self.busy_seconds += elapsed
+                TRACER.record("idle.task", elapsed, task=name)
+    
+    def _run(self):
+        while True:
+            _, _, name, fn, _ = self._next()
+            try:
+                self._execute(name, fn)
+            finally:
+                self.current = None
+    
+    def drain(self, up_to: int = FLUSH):
+        """Run queued tasks up to a priority on the calling thread (shutdown)"""
+        while True:
+            with self._cond:
+                if not self._queue or self._queue[0][0] > up_to:
+                    return
+                entry = heapq.heappop(self._queue)
+                self._keys.pop(entry[4], None)
+            self._execute(entry[2], entry[3])
+    
+    def format_stats(self) -> str:
+        """Queue depth and where idle time went, for /idle"""
+        lines = [f"Idle scheduler: {self.depth()} queued, {self.busy_seconds:.1f}s of work done in idle time"
+                 + (f", running {self.current}" if self.current else "")]
+        for name, stats in sorted(self.stats.items(), key=lambda item: -item[1]["seconds"]):
+            line = f"  {name:<22}{stats['runs']:>6} runs {stats['seconds'] * 1000:>10.1f} ms"
+            if stats["errors"]:
+                line += f"   {stats['errors']} errors (last: {stats.get('last_error', '')[:60]})"
+            lines.append(line)
+        return "\n".join(lines)
@@ -0,0 +1,142 @@
+import os
+import time
+import queue
+import threading
+from typing import Iterator, Optional
+
+from anih_trace import TRACER
+
+
+LLAMA_CPP_AVAILABLE = False
+
+try:
+    from llama_cpp import Llama, LlamaRAMCache
+    LLAMA_CPP_AVAILABLE = True
+except:
+    pass
+
+
+CACHE_BYTES = 512 * 1024 * 1024
+
+_MODELS = {}
+_MODELS_LOCK = threading.Lock()
+
+
+class LocalStream:
+    """
+    One generation running on its own thread, pieces handed over through a queue
+
+    The model lock is held by that thread only, so a consumer that gives
+    up (barge-in) just calls stop() - generation ends at the next token
+    and the lock is free again, without touching a half-run generator.
+    """
+    
+    def __init__(self, model: "LocalLLM", messages: list, **kwargs):
+        self.pieces = queue.Queue()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(model, messages, kwargs),
+                                       name="anih-local-llm", daemon=True)
+        self.thread.start()
+    
+    def _run(self, model: "LocalLLM", messages: list, kwargs: dict):
+        try:
+            with model.lock, TRACER.span("llm.local", model=model.name) as span:
+                start = time.perf_counter()
+                pieces = 0
+                for chunk in model.llm.create_chat_completion(messages, stream=True, **kwargs):
+                    if self.stopped.is_set():
+                        span["stopped"] = True
+                        break
+                    piece = chunk["choices"][0].get("delta", {}).get("content")
+                    if not piece:
+                        continue
+                    if not pieces:
+                        span["ttft_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                    pieces += 1
+                    self.pieces.put(piece)
+                span["pieces"] = pieces
+        except Exception as e:
+            self.pieces.put(e)
+        finally:
+            self.pieces.put(None)
+    
+    def get(self) -> Optional[str]:
+        """Next piece (blocks), None once generation is over - re-raises a generation error"""
+        item = self.pieces.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+    
+    def stop(self):
+        self.stopped.set()
+    
+    def __iter__(self) -> Iterator[str]:
+        try:
+            while True:
+                piece = self.get()
+                if piece is None:
+                    return
+                yield piece
+        finally:
+            self.stop()
+
+
+class LocalLLM:
+    """
+    Quantized GGUF model running in-process through llama.cpp
+
+    Weights are memory-mapped, so loading is mostly page faults and several
+    processes share one copy. llama.cpp keeps the KV cache of the previous
+    prompt and only evaluates tokens after the common prefix, so the
+    unchanged persona at the top of the system prompt is never re-prefilled.
+    The RAM cache keeps states for a few other prefixes around too.
+    """
+    
+    def __init__(self, model_path: str, n_ctx: int = 4096, n_threads: Optional[int] = None,
+                 n_batch: int = 256, cache_bytes: int = CACHE_BYTES):
+        if not LLAMA_CPP_AVAILABLE:
+            raise RuntimeError("llama.cpp bindings not installed: pip install llama-cpp-python")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"GGUF model not found: {model_path}")
+        
+        self.model_path = model_path
+        self.name = os.path.basename(model_path)
+        threads = n_threads or max(1, (os.cpu_count() or 2) // 2)
+        
+        start = time.perf_counter()
+        self.llm = Llama(
+            model_path=model_path,
+            n_ctx=n_ctx,
+            n_threads=threads,
+            n_threads_batch=threads,
+            n_batch=n_batch,
+            use_mmap=True,
+            verbose=False
+        )
+        if cache_bytes:
+            self.llm.set_cache(LlamaRAMCache(capacity_bytes=cache_bytes))
+        TRACER.record("llm.load", time.perf_counter() - start, model=self.name, threads=threads)
+        
+        self.lock = threading.Lock()
+    
+    def stream(self, system_prompt: str, prompt: str, max_tokens: int = 500,
+               temperature: float = 0.8, top_p: float = 0.9) -> LocalStream:
+        """Start generating - iterate the result (or get() from it) for reply text as tokens are sampled"""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        return LocalStream(self, messages, max_tokens=max_tokens, temperature=temperature, top_p=top_p)
+    
+    def complete(self, system_prompt: str, prompt: str, **kwargs) -> str:
+        return "".join(self.stream(system_prompt, prompt, **kwargs))
+
+
+def load_local_llm(model_path: str, **kwargs) -> LocalLLM:
+    """Shared LocalLLM for a model path - loaded once per process"""
+    with _MODELS_LOCK:
+        model = _MODELS.get(model_path)
+        if model is None:
+            model = _MODELS[model_path] = LocalLLM(model_path, **kwargs)
+        return model
+
@@ -0,0 +1,13 @@
+import os
+import importlib.util
+
+
+ANIH_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Anih_CE_2.0.py")
+
+
+def load_anih(path: str = ANIH_SCRIPT):
+    """Import Anih_CE_2.0.py as a module (its file name is not importable)"""
+    spec = importlib.util.spec_from_file_location("anih_core", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,243 @@
+import os
+import time
+import atexit
+import threading
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from anih_trace import TRACER
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_watched = contextvars.ContextVar("anih_metric_watch", default=())
+
+
+def _label_key(labels: Dict) -> Tuple:
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: Tuple, extra: Optional[Tuple] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        for events in _watched.get():
+            events.append((self.name, labels))
+    
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+    
+    def total(self) -> float:
+        """Sum over every label set"""
+        with self._lock:
+            return sum(self._values.values())
+    
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}_total{_format_labels(key)} {value}" for key, value in items]
+
+
+@contextmanager
+def watch(events: Optional[list] = None):
+    """
+    Collect the counter increments made by this task / thread (and the
+    threads it hands work to) as (name, labels) - unlike deltas of the
+    totals, concurrent callers don't see each other's. Nested watches
+    all see them, and passing events keeps adding to an earlier list.
+    """
+    events = [] if events is None else events
+    token = _watched.set(_watched.get() + (events,))
+    try:
+        yield events
+    finally:
+        _watched.reset(token)
+
+
+def watch_iter(iterable, events: list):
+    """Step through a stream under watch(events) - a with block around the yields would leak into the consumer"""
+    iterator = iter(iterable)
+    while True:
+        with watch(events):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+async def awatch_iter(iterable, events: list):
+    """watch_iter for async streams"""
+    iterator = iterable.__aiter__()
+    while True:
+        with watch(events):
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+        yield item
+
+
+class Histogram:
+    """Cumulative bucket histogram (seconds unless stated otherwise)"""
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, (list(s[0]), s[1], s[2])) for key, s in self._series.items()]
+        
+        lines = []
+        for key, (counts, total, count) in items:
+            running = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                running += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', repr(float(bound))))} {running}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+        return lines
+
+
+class Registry:
+    """Holds every metric and renders OpenMetrics text"""
+    
+    def __init__(self):
+        self.metrics = {}
+    
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, help_text))
+    
+    def histogram(self, name: str, help_text: str, buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, help_text, buckets))
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.extend(metric.samples())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+TURNS = REGISTRY.counter("anih_turns", "Chat turns handled")
+PROVIDER_REQUESTS = REGISTRY.counter("anih_provider_requests", "LLM provider HTTP requests by status")
+PROVIDER_ERRORS = REGISTRY.counter("anih_provider_errors", "LLM provider failures by kind")
+FALLBACKS = REGISTRY.counter("anih_fallbacks", "Replies served from fallback_response")
+TTS_FAILURES = REGISTRY.counter("anih_tts_failures", "Speech synthesis or playback failures")
+CACHE_HITS = REGISTRY.counter("anih_cache_hits", "Cache hits by cache")
+CACHE_MISSES = REGISTRY.counter("anih_cache_misses", "Cache misses by cache")
+PERSISTED_BYTES = REGISTRY.counter("anih_persisted_bytes", "Bytes written to memory and history files")
+IMAGES = REGISTRY.counter("anih_images", "Image generation attempts by backend and result")
+STAGE_SECONDS = REGISTRY.histogram("anih_stage_seconds", "Time spent per traced stage")
+
+
+def observe_span(span: Dict):
+    """Tracer listener - turns finished spans into metrics"""
+    name = span["name"]
+    STAGE_SECONDS.observe(span["ms"] / 1000.0, stage=name)
+    
+    if name == "turn":
+        TURNS.inc()
+    elif name == "llm.http":
+        PROVIDER_REQUESTS.inc(provider=span.get("provider", "unknown"), status=span.get("status", "error"))
+    elif name.startswith("persist.") and span.get("bytes"):
+        PERSISTED_BYTES.inc(span["bytes"], file=name.split(".", 1)[1])
+
+
+if observe_span not in TRACER.listeners:
+    TRACER.listeners.append(observe_span)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+    
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_http_server(port: int, address: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics on a background thread"""
+    server = ThreadingHTTPServer((address, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="anih-metrics", daemon=True).start()
+    return server
+
+
+def write_textfile(path: str):
+    """Atomically write the metrics for node_exporter's textfile collector"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(REGISTRY.render())
+    os.replace(tmp_path, path)
+
+
+def start_textfile_writer(path: str, interval: float = 15.0) -> threading.Thread:
+    """Rewrite the textfile every interval seconds and once more at exit"""
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                write_textfile(path)
+            except Exception as e:
+                print(f"⚠️ Could not write metrics file: {e}")
+    
+    atexit.register(lambda: write_textfile(path))
+    thread = threading.Thread(target=loop, name="anih-metrics-textfile", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,154 @@
+import os
+import sys
+import time
+import pstats
+import cProfile
+import datetime
+import itertools
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Dict, Optional
+
+
+SAMPLE_INTERVAL = 0.005
+TRACEMALLOC_FRAMES = 16
+TOP_ALLOCATIONS = 30
+TOP_FUNCTIONS = 40
+
+
+def _collapse(frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+class Profiler:
+    """
+    One profiling window: cProfile, tracemalloc and a stack sampler
+
+    cProfile only sees the thread that started it (the event loop), so a
+    sampler thread also snapshots every thread's stack each few ms. That
+    covers to_thread work, TTS and the idle scheduler. stop() writes:
+    - profile_<stamp>.pstats, the raw cProfile data (snakeviz, pstats)
+    - profile_<stamp>.txt, the top functions by cumulative time
+    - stacks_<stamp>.folded, collapsed stacks for flamegraph.pl / speedscope
+    - alloc_<stamp>.txt, the top allocations and growth over the window
+    """
+    
+    def __init__(self, folder: str, interval: float = SAMPLE_INTERVAL):
+        self.folder = folder
+        self.interval = interval
+        self.profile = None
+        self.started = None
+        self.samples = Counter()
+        self._baseline = None
+        self._owns_tracemalloc = False
+        self._stop = threading.Event()
+        self._sampler = None
+    
+    @property
+    def active(self) -> bool:
+        return self.profile is not None
+    
+    def start(self):
+        if self.active:
+            raise RuntimeError("profiler already running")
+        self.samples = Counter()
+        self.started = time.time()
+        
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._owns_tracemalloc = True
+        self._baseline = tracemalloc.take_snapshot()
+        
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample, name="anih-profiler", daemon=True)
+        self._sampler.start()
+        
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+    
+    def _sample(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != me:
+                    self.samples[f"{names.get(ident, ident)};{_collapse(frame)}"] += 1
+    
+    def stop(self) -> Dict[str, str]:
+        """End the window and write the reports, returns their paths"""
+        if not self.active:
+            raise RuntimeError("profiler is not running")
+        self.profile.disable()
+        self._stop.set()
+        self._sampler.join()
+        
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+        
+        os.makedirs(self.folder, exist_ok=True)
+        stamp = base = datetime.datetime.fromtimestamp(self.started).strftime("%Y%m%d_%H%M%S")
+        for n in itertools.count(2):
+            if not os.path.exists(os.path.join(self.folder, f"profile_{stamp}.pstats")):
+                break
+            stamp = f"{base}_{n}"
+        paths = {
+            "pstats": os.path.join(self.folder, f"profile_{stamp}.pstats"),
+            "functions": os.path.join(self.folder, f"profile_{stamp}.txt"),
+            "stacks": os.path.join(self.folder, f"stacks_{stamp}.folded"),
+            "allocations": os.path.join(self.folder, f"alloc_{stamp}.txt"),
+        }
+        
+        self.profile.dump_stats(paths["pstats"])
+        with open(paths["functions"], 'w', encoding='utf-8') as f:
+            stats = pstats.Stats(self.profile, stream=f)
+            stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            stats.sort_stats("tottime").print_stats(TOP_FUNCTIONS)
+        
+        with open(paths["stacks"], 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        
+        with open(paths["allocations"], 'w', encoding='utf-8') as f:
+            f.write(f"Traced memory: {current / 2**20:.1f} MiB now, {peak / 2**20:.1f} MiB peak\n\n")
+            f.write(f"Top {TOP_ALLOCATIONS} allocation sites still alive:\n")
+            for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+                f.write(f"  {stat}\n")
+            f.write(f"\nTop {TOP_ALLOCATIONS} growth since the window started:\n")
+            for stat in snapshot.compare_to(self._baseline, "lineno")[:TOP_ALLOCATIONS]:
+                f.write(f"  {stat}\n")
+        
+        self.profile = None
+        self._baseline = None
+        return paths
+    
+    def format_summary(self, paths: Dict[str, str], top: int = 8) -> str:
+        """Short console summary after stop()"""
+        elapsed = time.time() - self.started
+        lines = [f"Profiled {elapsed:.1f}s, {sum(self.samples.values())} stack samples"]
+        leaves = Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        for leaf, count in leaves.most_common(top):
+            lines.append(f"  {count:>6}  {leaf}")
+        lines.extend(f"  {kind:<12}{path}" for kind, path in paths.items())
+        return "\n".join(lines)
+
+
+_SESSION: Optional[Profiler] = None
+
+
+def session(folder: str) -> Profiler:
+    """The process-wide profiler (--profile and /profile share it)"""
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = Profiler(folder)
+    return _SESSION
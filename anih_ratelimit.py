@@ -0,0 +1,244 @@
+import re
+import time
+import asyncio
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Mapping, Optional
+
+from anih_trace import TRACER
+
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_priority = contextvars.ContextVar("anih_request_priority", default=INTERACTIVE)
+
+
+class RateLimitExceeded(Exception):
+    """The wait for budget would be longer than the caller allows"""
+    
+    def __init__(self, wait: float):
+        super().__init__(f"rate limited for another {wait:.1f}s")
+        self.wait = wait
+
+
+@contextmanager
+def background():
+    """Calls made inside this block (thread or task) queue behind interactive turns"""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+def estimate_tokens(payload: Dict) -> int:
+    """Rough token cost of a chat request - prompt chars / 4 plus the completion budget"""
+    chars = sum(len(message.get("content") or "") for message in payload.get("messages", []))
+    chars += len(payload.get("prompt") or "")
+    return chars // 4 + int(payload.get("max_tokens") or 0)
+
+
+def usage_tokens(data: Dict) -> Optional[int]:
+    """Tokens actually billed for an OpenAI style response body"""
+    usage = data.get("usage") or {}
+    return usage.get("total_tokens") or (usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)) or None
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds from '1.5', '7.66s', '120ms' or '2m59.56s' style header values"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r'([\d.]+)(ms|h|m|s)', value):
+        matched = True
+        total += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return total if matched else None
+
+
+class TokenBucket:
+    """Budget that refills continuously up to capacity (None means unlimited)"""
+    
+    def __init__(self, per_minute: Optional[float]):
+        self.capacity = per_minute
+        self.tokens = float(per_minute or 0)
+        self.updated = time.monotonic()
+    
+    def refill(self, now: float):
+        if self.capacity is None:
+            return
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+    
+    def time_until(self, amount: float) -> float:
+        """Seconds until amount can be taken (call refill first)"""
+        if self.capacity is None:
+            return 0.0
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) * 60.0 / self.capacity
+    
+    def take(self, amount: float):
+        if self.capacity is not None:
+            self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """
+    Client side request + token budgets for one API key
+
+    Calls wait their turn instead of hitting 429s. The buckets follow the
+    provider's x-ratelimit-* headers and honour retry-after, and background
+    callers only get budget when no interactive turn is waiting.
+    """
+    
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 max_wait: float = 30.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_wait = max_wait
+        self.blocked_until = 0.0
+        self.waiting = {INTERACTIVE: 0, BACKGROUND: 0}
+        self.stats = {"granted": 0, "delayed": 0, "rejected": 0, "throttled": 0, "waited": 0.0}
+        self._cond = threading.Condition()
+    
+    def _reserve(self, tokens: int, priority: int) -> float:
+        """Take the budget and return 0, or return how long to wait first"""
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        
+        wait = max(self.blocked_until - now, self.requests.time_until(1), self.tokens.time_until(tokens))
+        if priority != INTERACTIVE and self.waiting[INTERACTIVE]:
+            wait = max(wait, 0.05)
+        if wait > 0:
+            return wait
+        
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        return 0.0
+    
+    def _check(self, wait: float, started: float, max_wait: Optional[float]):
+        limit = self.max_wait if max_wait is None else max_wait
+        if limit is not None and time.monotonic() - started + wait > limit:
+            self.stats["rejected"] += 1
+            raise RateLimitExceeded(wait)
+    
+    def _granted(self, started: float, priority: int) -> float:
+        waited = time.monotonic() - started
+        self.stats["granted"] += 1
+        if waited > 0.001:
+            self.stats["delayed"] += 1
+            self.stats["waited"] += waited
+            TRACER.record("ratelimit.wait", waited, priority=PRIORITY_NAMES.get(priority, priority))
+        return waited
+    
+    def acquire(self, tokens: int = 0, priority: Optional[int] = None, max_wait: Optional[float] = None) -> float:
+        """
+        Block until one request and tokens fit the budget
+
+        Returns seconds spent waiting, raises RateLimitExceeded when the
+        wait would pass max_wait.
+        """
+        priority = current_priority() if priority is None else priority
+        started = time.monotonic()
+        with self._cond:
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    wait = self._reserve(tokens, priority)
+                    if not wait:
+                        break
+                    self._check(wait, started, max_wait)
+                    self._cond.wait(wait)
+            finally:
+                self.waiting[priority] -= 1
+                self._cond.notify_all()
+        return self._granted(started, priority)
+    
+    async def aacquire(self, tokens: int = 0, priority: Optional[int] = None, max_wait: Optional[float] = None) -> float:
+        """acquire() for coroutines - sleeps instead of blocking the loop"""
+        priority = current_priority() if priority is None else priority
+        started = time.monotonic()
+        with self._cond:
+            self.waiting[priority] += 1
+        try:
+            while True:
+                with self._cond:
+                    wait = self._reserve(tokens, priority)
+                if not wait:
+                    break
+                self._check(wait, started, max_wait)
+                await asyncio.sleep(min(wait, 0.25))
+        finally:
+            with self._cond:
+                self.waiting[priority] -= 1
+                self._cond.notify_all()
+        return self._granted(started, priority)
+    
+    def settle(self, reserved: int, used: Optional[int]):
+        """Refund (or charge) the difference once the real token usage is known"""
+        if used is None or self.tokens.capacity is None:
+            return
+        with self._cond:
+            self.tokens.tokens = min(self.tokens.capacity, self.tokens.tokens + reserved - used)
+            self._cond.notify_all()
+    
+    def observe(self, status: int, headers: Mapping[str, str]):
+        """Sync with the provider's view of our budget after every response"""
+        def header(name):
+            return headers.get(name) or headers.get(name.title())
+        
+        now = time.monotonic()
+        with self._cond:
+            limit_tokens = header("x-ratelimit-limit-tokens")
+            if limit_tokens and limit_tokens.isdigit() and self.tokens.capacity is not None:
+                self.tokens.capacity = float(limit_tokens)
+            
+            remaining_tokens = header("x-ratelimit-remaining-tokens")
+            if remaining_tokens and remaining_tokens.isdigit() and self.tokens.capacity is not None:
+                self.tokens.refill(now)
+                self.tokens.tokens = min(self.tokens.tokens, float(remaining_tokens))
+            
+            if header("x-ratelimit-remaining-requests") == "0":
+                reset = parse_duration(header("x-ratelimit-reset-requests"))
+                if reset:
+                    self.blocked_until = max(self.blocked_until, now + reset)
+            
+            if status == 429:
+                self.stats["throttled"] += 1
+                retry_after = parse_duration(header("retry-after")) or \
+                    parse_duration(header("x-ratelimit-reset-tokens")) or 1.0
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+            
+            self._cond.notify_all()
+    
+    def format_stats(self) -> str:
+        """One line summary for /perf"""
+        stats = self.stats
+        with self._cond:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+        
+        def budget(bucket):
+            return "unlimited" if bucket.capacity is None else f"{bucket.tokens:.0f}/{bucket.capacity:.0f}"
+        
+        return (f"requests {budget(self.requests)}, tokens {budget(self.tokens)} | "
+                f"granted {stats['granted']}, delayed {stats['delayed']} ({stats['waited']:.1f}s), "
+                f"429s {stats['throttled']}, gave up {stats['rejected']}")
@@ -0,0 +1,153 @@
+import sys
+import time
+import datetime
+from typing import Any, Dict, List, Optional
+
+
+TURN_KEYS = frozenset(("timestamp", "user", "response"))
+MEMORY_KEYS = frozenset(("timestamp", "content"))
+MEMORY_CATEGORIES = ("shared_experiences", "devotion_moments")
+
+_MISSING = object()
+
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_OFFSETS = {}
+
+
+def _utc_offset(moment: datetime.datetime):
+    """Local UTC offset for moment's hour, False inside a DST gap (cached - mktime is slow)"""
+    key = (moment.year, moment.month, moment.day, moment.hour)
+    offset = _OFFSETS.get(key)
+    if offset is None:
+        hour = moment.replace(minute=0, second=0, microsecond=0)
+        ts = hour.timestamp()
+        offset = _OFFSETS[key] = (hour - _EPOCH).total_seconds() - ts if datetime.datetime.fromtimestamp(ts) == hour else False
+    return offset
+
+
+def parse_timestamp(text: Any) -> Optional[float]:
+    """Epoch seconds for a str(datetime.now()) value, None if it would not format back the same"""
+    if not isinstance(text, str) or len(text) not in (19, 26) or text[10] != " ":
+        return None
+    try:
+        moment = datetime.datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    offset = _utc_offset(moment)
+    if offset is False or (len(text) == 26 and not moment.microsecond):
+        return None
+    return (moment - _EPOCH).total_seconds() - offset
+
+
+def format_timestamp(ts: float) -> str:
+    """The str(datetime.now()) layout the JSON files have always used"""
+    return str(datetime.datetime.fromtimestamp(ts))
+
+
+def _split(data: Dict, keys: frozenset) -> tuple:
+    """(ts, raw_ts, extra) - ts is None when the stamp is missing or unreadable, raw_ts then keeps it as found"""
+    stamp = data.get("timestamp", _MISSING)
+    ts = parse_timestamp(stamp)
+    extra = None
+    if data.keys() != keys:
+        extra = {key: value for key, value in data.items() if key not in keys} or None
+    if ts is None:
+        return None, stamp, extra
+    return ts, None, extra
+
+
+def _stamp(record) -> Optional[str]:
+    if record.ts is not None:
+        return format_timestamp(record.ts)
+    return None if record.raw_ts is _MISSING else record.raw_ts
+
+
+def _with_extra(record, data: Dict) -> Dict:
+    if record.ts is None and record.raw_ts is _MISSING:
+        del data["timestamp"]
+    if record.extra:
+        data.update(record.extra)
+    return data
+
+
+class Turn:
+    """One conversation_history entry (response stays None until the reply is in)"""
+    __slots__ = ("ts", "user", "response", "raw_ts", "extra")
+    
+    def __init__(self, user: str, response: Optional[str] = None, ts: Optional[float] = None):
+        self.ts = time.time() if ts is None else ts
+        self.user = user
+        self.response = response
+        self.raw_ts = None
+        self.extra = None
+    
+    @property
+    def timestamp(self) -> Optional[str]:
+        return _stamp(self)
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Turn":
+        turn = cls.__new__(cls)
+        turn.user = data.get("user")
+        turn.response = data.get("response")
+        turn.ts, turn.raw_ts, turn.extra = _split(data, TURN_KEYS)
+        return turn
+    
+    def to_dict(self) -> Dict:
+        data = {"timestamp": self.timestamp, "user": self.user, "response": self.response}
+        return _with_extra(self, data)
+
+
+class MemoryItem:
+    """One entry of a list-valued memory category (shared_experiences, devotion_moments, ...)"""
+    __slots__ = ("ts", "content", "category", "raw_ts", "extra")
+    
+    def __init__(self, category: str, content: Any, ts: Optional[float] = None):
+        self.ts = time.time() if ts is None else ts
+        self.content = content
+        self.category = sys.intern(category)
+        self.raw_ts = None
+        self.extra = None
+    
+    @property
+    def timestamp(self) -> Optional[str]:
+        return _stamp(self)
+    
+    @classmethod
+    def from_dict(cls, category: str, data: Dict) -> "MemoryItem":
+        item = cls.__new__(cls)
+        item.content = data.get("content")
+        item.category = sys.intern(category)
+        item.ts, item.raw_ts, item.extra = _split(data, MEMORY_KEYS)
+        return item
+    
+    def to_dict(self) -> Dict:
+        data = {"timestamp": self.timestamp, "content": self.content}
+        return _with_extra(self, data)
+
+
+def to_json(record: Any) -> Dict:
+    """json.dumps(default=...) hook - records go out in the old dict layout"""
+    if isinstance(record, (Turn, MemoryItem)):
+        return record.to_dict()
+    raise TypeError(f"{type(record).__name__} is not JSON serializable")
+
+
+def turns_from_json(data: List) -> List[Turn]:
+    return [Turn.from_dict(entry) for entry in data if isinstance(entry, dict)]
+
+
+def memory_from_json(data: Dict) -> Dict:
+    """Turn every list of {"timestamp", "content"} entries into MemoryItems, in place"""
+    for category, value in data.items():
+        if not isinstance(value, list):
+            continue
+        if category not in MEMORY_CATEGORIES and not any(isinstance(entry, dict) and "content" in entry
+                                                         for entry in value):
+            continue
+        items = [MemoryItem.from_dict(category, entry) for entry in value if isinstance(entry, dict)]
+        if len(items) < len(value):
+            print(f"⚠️ Dropped {len(value) - len(items)} unreadable {category} entries")
+        data[category] = items
+    return data
@@ -0,0 +1,117 @@
+import re
+import threading
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional
+
+from anih_trace import TRACER, percentile
+
+
+GREETINGS = {
+    "hi", "hey", "hello", "yo", "sup", "hiya", "heyy", "bye", "goodbye", "gn", "good night", "good morning",
+    "gm", "morning", "night", "brb", "what's up", "whats up", "how are you", "how are u", "you there",
+}
+
+SMALL_TALK = GREETINGS | {
+    "ok", "okay", "k", "kk", "lol", "lmao", "haha", "hehe", "love you", "i love you", "love u", "miss you",
+    "i miss you", "thanks", "thank you", "ty", "nice", "cool", "yes", "no", "yeah", "yep", "nah", "nope",
+    "hmm", "mhm",
+}
+
+DEEP_KEYWORDS = (
+    "why", "explain", "how do", "how does", "how can", "how to", "what do you think", "should i", "advice",
+    "help", "remember", "feel", "feeling", "worried", "sad", "stressed", "problem", "code", "bug", "project",
+    "plan", "idea", "story", "tell me about", "describe", "difference", "opinion", "because",
+)
+
+_WORD = re.compile(r"[\w']+")
+
+
+class Route(NamedTuple):
+    tier: str
+    model: str
+    max_tokens: int
+    reason: str
+
+
+class ModelRouter:
+    """
+    Picks a Groq model per turn from cheap signals
+
+    Greetings and one-liners go to the fast model with a small token cap,
+    anything long, question-like, emotional or continuing a deep exchange
+    goes to the large one.
+    """
+    
+    def __init__(self, large_model: str, fast_model: str, large_max_tokens: int = 500,
+                 fast_max_tokens: int = 150, max_small_talk_words: int = 6, enabled: bool = True):
+        self.large_model = large_model
+        self.fast_model = fast_model
+        self.large_max_tokens = large_max_tokens
+        self.fast_max_tokens = fast_max_tokens
+        self.max_small_talk_words = max_small_talk_words
+        self.enabled = enabled
+        self.decisions = {"fast": 0, "large": 0}
+        self.latency = {}
+        self._lock = threading.Lock()
+    
+    def _is_deep(self, text: str) -> Optional[str]:
+        lower = " ".join(_WORD.findall(text.lower()))
+        if not lower:
+            return None
+        if any(re.search(rf"\b{keyword}\b", lower) for keyword in DEEP_KEYWORDS):
+            return "keyword"
+        if len(lower.split()) > self.max_small_talk_words:
+            return "length"
+        if "?" in text and lower not in SMALL_TALK and len(lower.split()) > 3:
+            return "question"
+        return None
+    
+    def route(self, text: str, history: Optional[List] = None) -> Route:
+        """Route for one user line (history = Turn records before it)"""
+        if not self.enabled:
+            return self._decide("large", "routing off")
+        
+        reason = self._is_deep(text)
+        if reason:
+            return self._decide("large", reason)
+        
+        lower = " ".join(_WORD.findall(text.lower()))
+        if lower not in GREETINGS:
+            previous = next((entry.user for entry in reversed(history or [])
+                             if entry.user and entry.response), None)
+            if previous and self._is_deep(previous):
+                return self._decide("large", "follow-up")
+        
+        return self._decide("fast", "small talk")
+    
+    def _decide(self, tier: str, reason: str) -> Route:
+        with self._lock:
+            self.decisions[tier] += 1
+        if tier == "fast":
+            route = Route(tier, self.fast_model, self.fast_max_tokens, reason)
+        else:
+            route = Route(tier, self.large_model, self.large_max_tokens, reason)
+        TRACER.record("route", 0.0, tier=tier, model=route.model, reason=reason)
+        return route
+    
+    def observe_span(self, span: Dict):
+        """Tracer listener - latency per model from finished llm.http spans"""
+        if span["name"] != "llm.http" or span.get("provider") != "groq" or span.get("status") != 200:
+            return
+        with self._lock:
+            samples = self.latency.setdefault(span.get("model", "unknown"), deque(maxlen=500))
+            samples.append(span.get("ttfb_ms", span["ms"]))
+    
+    def format_stats(self) -> str:
+        """Routing split and per-model latency for /perf"""
+        with self._lock:
+            decisions = dict(self.decisions)
+            latency = {model: list(samples) for model, samples in self.latency.items()}
+        
+        total = sum(decisions.values()) or 1
+        lines = [f"Routing: fast {decisions['fast']} ({decisions['fast'] * 100 // total}%), "
+                 f"large {decisions['large']} ({decisions['large'] * 100 // total}%)"]
+        for model, samples in latency.items():
+            lines.append(f"  {model:<28}{len(samples):>6} calls   p50 {percentile(samples, 50):>7.0f} ms"
+                         f"   p95 {percentile(samples, 95):>7.0f} ms")
+        return "\n".join(lines)
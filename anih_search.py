@@ -0,0 +1,257 @@
+import gc
+import os
+import re
+import json
+import math
+import pickle
+import datetime
+import threading
+from typing import List, NamedTuple, Optional
+
+
+DOCS_NAME = "docs.jsonl"
+SNAPSHOT_NAME = "index.pickle"
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+PAGE_SIZE = 10
+SNIPPET_CHARS = 160
+
+_TOKEN = re.compile(r"[\w']+")
+_QUERY = re.compile(r'(\w+):(\S+)|"([^"]*)"|(\S+)')
+
+
+def tokenize(text: str) -> List[str]:
+    return [token.strip("'") for token in _TOKEN.findall(text.lower()) if token.strip("'")]
+
+
+class Hit(NamedTuple):
+    score: float
+    doc_id: int
+    kind: str
+    ts: Optional[float]
+    snippet: str
+
+
+class SearchIndex:
+    """
+    Inverted index over turns and memories, with positional postings
+
+    Documents are appended to docs.jsonl (never rewritten, a damaged tail
+    is cut off on load), postings map term -> {doc id: [positions]}. A
+    pickled snapshot of the postings is written now and then, so startup
+    only indexes documents added after it. Queries AND their terms, "quoted phrases" must match positions in
+    order, results are ranked with BM25.
+    """
+    
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.docs = []
+        self.postings = {}
+        self.lengths = []
+        self.total_length = 0
+        self.snapshot_docs = 0
+        self._loaded = False
+        self._file = None
+        self._lock = threading.RLock()
+        os.makedirs(folder, exist_ok=True)
+    
+    def _load(self):
+        if self._loaded:
+            return
+        docs_path = os.path.join(self.folder, DOCS_NAME)
+        if os.path.exists(docs_path):
+            good = 0
+            with open(docs_path, 'rb') as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("unfinished line")
+                        self.docs.append(json.loads(line))
+                    except ValueError:
+                        break
+                    good += len(line)
+            if good < os.path.getsize(docs_path):
+                print(f"⚠️ Search log damaged after document {len(self.docs)}, dropping the rest")
+                os.truncate(docs_path, good)
+        
+        snapshot_path = os.path.join(self.folder, SNAPSHOT_NAME)
+        try:
+            collecting = gc.isenabled()
+            gc.disable()
+            try:
+                with open(snapshot_path, 'rb') as f:
+                    snapshot = pickle.load(f)
+            finally:
+                if collecting:
+                    gc.enable()
+            if snapshot["docs"] <= len(self.docs):
+                self.postings = snapshot["postings"]
+                self.lengths = snapshot["lengths"]
+                self.total_length = sum(self.lengths)
+                self.snapshot_docs = snapshot["docs"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Search index snapshot unreadable, rebuilding: {e}")
+            self.postings, self.lengths, self.total_length = {}, [], 0
+        
+        for doc_id in range(len(self.lengths), len(self.docs)):
+            self._index(doc_id, self.docs[doc_id]["text"])
+        self._file = open(docs_path, 'a', encoding='utf-8')
+        self._loaded = True
+    
+    def _index(self, doc_id: int, text: str):
+        tokens = tokenize(text)
+        for position, token in enumerate(tokens):
+            self.postings.setdefault(token, {}).setdefault(doc_id, []).append(position)
+        self.lengths.append(len(tokens))
+        self.total_length += len(tokens)
+    
+    def is_new(self) -> bool:
+        """Nothing indexed yet (checked without loading the index)"""
+        return not os.path.exists(os.path.join(self.folder, DOCS_NAME))
+    
+    def load(self):
+        with self._lock:
+            self._load()
+    
+    def add(self, kind: str, ts: float, text: str) -> int:
+        """Index one document and append it to the log, returns its id"""
+        with self._lock:
+            self._load()
+            doc = {"kind": kind, "ts": ts, "text": text}
+            doc_id = len(self.docs)
+            self._file.write(json.dumps(doc, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self.docs.append(doc)
+            self._index(doc_id, text)
+            return doc_id
+    
+    def save(self):
+        """Snapshot the postings so the next start skips re-indexing"""
+        with self._lock:
+            if not self._loaded or self.snapshot_docs == len(self.docs):
+                return
+            snapshot_path = os.path.join(self.folder, SNAPSHOT_NAME)
+            with open(snapshot_path + ".tmp", 'wb') as f:
+                pickle.dump({"docs": len(self.docs), "postings": self.postings, "lengths": self.lengths},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(snapshot_path + ".tmp", snapshot_path)
+            self.snapshot_docs = len(self.docs)
+    
+    def close(self):
+        """Snapshot and close the document log"""
+        with self._lock:
+            self.save()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._loaded = False
+            self.docs, self.postings, self.lengths, self.total_length = [], {}, [], 0
+    
+    def _phrase_docs(self, tokens: List[str], candidates: Optional[set]) -> set:
+        postings = [self.postings.get(token, {}) for token in tokens]
+        docs = set(postings[0]) if candidates is None else candidates & set(postings[0])
+        for other in postings[1:]:
+            docs &= set(other)
+        matched = set()
+        for doc_id in docs:
+            later = [set(other[doc_id]) for other in postings[1:]]
+            if any(all(start + offset + 1 in positions for offset, positions in enumerate(later))
+                   for start in postings[0][doc_id]):
+                matched.add(doc_id)
+        return matched
+    
+    def search(self, query: str, page: int = 1, page_size: int = PAGE_SIZE):
+        """
+        Ranked hits for a query, plus the total match count
+
+        Supports words, "exact phrases", since:YYYY-MM-DD, until:YYYY-MM-DD,
+        kind:turn|shared_experiences|preferences_learned and page:N.
+        """
+        terms, phrases, since, until, kind = [], [], None, None, None
+        for key, value, phrase, word in _QUERY.findall(query):
+            if key == "since":
+                since = datetime.datetime.fromisoformat(value).timestamp()
+            elif key == "until":
+                until = (datetime.datetime.fromisoformat(value) + datetime.timedelta(days=1)).timestamp()
+            elif key == "kind":
+                kind = value
+            elif key == "page":
+                page = max(1, int(value))
+            elif phrase:
+                tokens = tokenize(phrase)
+                if tokens:
+                    phrases.append(tokens)
+                    terms.extend(tokens)
+            else:
+                terms.extend(tokenize(f"{key}:{value}" if key else word))
+        
+        with self._lock:
+            self._load()
+            if not terms:
+                return [], 0
+            
+            candidates = None
+            for term in sorted(set(terms), key=lambda t: len(self.postings.get(t, ()))):
+                docs = self.postings.get(term)
+                if not docs:
+                    return [], 0
+                candidates = set(docs) if candidates is None else candidates & docs.keys()
+            for tokens in phrases:
+                if len(tokens) > 1:
+                    candidates = self._phrase_docs(tokens, candidates)
+            
+            if since is not None or until is not None or kind is not None:
+                candidates = {doc_id for doc_id in candidates
+                              if (since is None or (self.docs[doc_id]["ts"] is not None and self.docs[doc_id]["ts"] >= since))
+                              and (until is None or (self.docs[doc_id]["ts"] is not None and self.docs[doc_id]["ts"] < until))
+                              and (kind is None or self.docs[doc_id]["kind"] == kind)}
+            
+            count = len(self.docs)
+            average = self.total_length / count if count else 1.0
+            scores = dict.fromkeys(candidates, 0.0)
+            for term in set(terms):
+                docs = self.postings[term]
+                idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+                for doc_id in candidates:
+                    frequency = len(docs[doc_id])
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[doc_id] / average)
+                    scores[doc_id] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+            
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], -(self.docs[item[0]]["ts"] or 0.0)))
+            start = (page - 1) * page_size
+            hits = [Hit(score, doc_id, self.docs[doc_id]["kind"], self.docs[doc_id]["ts"],
+                        self._snippet(self.docs[doc_id]["text"], terms))
+                    for doc_id, score in ranked[start:start + page_size]]
+            return hits, len(ranked)
+    
+    def _snippet(self, text: str, terms: List[str]) -> str:
+        lower = text.lower()
+        positions = [lower.find(term) for term in terms if lower.find(term) >= 0]
+        start = max(0, min(positions) - SNIPPET_CHARS // 3) if positions else 0
+        snippet = " ".join(text[start:start + SNIPPET_CHARS].split())
+        return ("..." if start else "") + snippet + ("..." if start + SNIPPET_CHARS < len(text) else "")
+    
+    def format_results(self, query: str) -> str:
+        """search() rendered for /memory search"""
+        started = datetime.datetime.now()
+        try:
+            hits, total = self.search(query)
+        except ValueError as e:
+            return f"Bad query: {e}"
+        elapsed = (datetime.datetime.now() - started).total_seconds() * 1000
+        if not total:
+            return f"Nothing found for '{query}' ({elapsed:.1f} ms)"
+        
+        match = re.search(r"\bpage:(\d+)", query)
+        page = max(1, int(match.group(1))) if match else 1
+        pages = math.ceil(total / PAGE_SIZE)
+        lines = [f"{total} matches ({elapsed:.1f} ms) - page {min(page, pages)}/{pages}"]
+        for hit in hits:
+            when = datetime.datetime.fromtimestamp(hit.ts).strftime("%Y-%m-%d %H:%M") if hit.ts is not None else "undated"
+            lines.append(f"💜 {when} [{hit.kind}] {hit.snippet}")
+        if page < pages:
+            lines.append(f"   ... add page:{page + 1} for more")
+        return "\n".join(lines)
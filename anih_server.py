@@ -0,0 +1,202 @@
+import os
+import re
+import json
+import time
+import asyncio
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from anih_loader import load_anih
+
+
+AIOHTTP_AVAILABLE = False
+
+try:
+    from aiohttp import web, WSMsgType
+    AIOHTTP_AVAILABLE = True
+except:
+    pass
+
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+MAX_SESSIONS = 256
+WORKER_THREADS = 64
+
+class Session:
+    """One user's AnihAI plus a lock so their turns never interleave"""
+    
+    def __init__(self, anih):
+        self.anih = anih
+        self.lock = asyncio.Lock()
+        self.last_used = time.time()
+    
+    def close(self):
+        """Write out pending changes and release file handles (blocking)"""
+        try:
+            self.anih.close()
+        except Exception as e:
+            print(f"⚠️ Could not close session cleanly: {e}")
+
+
+class AnihServer:
+    """
+    Hosts many concurrent Anih sessions over HTTP and WebSocket
+
+    Every user gets their own memory / history namespace under
+    ANIH_DATA_DIR/users/<user>. Sessions share one HTTP connection pool
+    and the same persona prompt prefix.
+    """
+    
+    def __init__(self, anih_module, max_sessions: int = MAX_SESSIONS, workers: int = WORKER_THREADS):
+        self.core = anih_module
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="anih-session")
+        self._creating = {}
+    
+    def user_dir(self, user: str) -> str:
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', user)[:64] or "default"
+        return os.path.join(self.core.ANIH_DATA_DIR, "users", safe)
+    
+    async def get_session(self, user: str) -> Session:
+        """Existing session for the user, or load one from their namespace"""
+        session = self.sessions.get(user)
+        if session is not None:
+            self.sessions.move_to_end(user)
+            session.last_used = time.time()
+            return session
+        
+        pending = self._creating.get(user)
+        if pending is None:
+            loop = asyncio.get_running_loop()
+            pending = loop.run_in_executor(
+                self.executor,
+                lambda: self.core.AnihAI(data_dir=self.user_dir(user), enable_voice=False)
+            )
+            self._creating[user] = pending
+        try:
+            anih = await pending
+        finally:
+            self._creating.pop(user, None)
+        
+        session = self.sessions.get(user)
+        if session is None:
+            session = self.sessions[user] = Session(anih)
+            self._evict()
+        return session
+    
+    def _evict(self):
+        """Drop least recently used idle sessions (their data is already on disk)"""
+        for user in list(self.sessions):
+            if len(self.sessions) <= self.max_sessions:
+                break
+            if not self.sessions[user].lock.locked():
+                self.executor.submit(self.sessions.pop(user).close)
+    
+    async def stream_turn(self, user: str, message: str):
+        """Async iterator over reply pieces for one turn"""
+        session = await self.get_session(user)
+        async with session.lock:
+            async for piece in session.anih.achat_stream(message):
+                yield piece
+    
+    async def handle_chat(self, request):
+        """POST /chat {"user": ..., "message": ...} - JSON, or SSE with ?stream=1"""
+        try:
+            body = await request.json()
+        except ValueError:
+            return web.json_response({"error": "body must be JSON"}, status=400)
+        
+        user = str(body.get("user") or "default")
+        message = str(body.get("message") or "").strip()
+        if not message:
+            return web.json_response({"error": "message is required"}, status=400)
+        
+        wants_stream = request.query.get("stream") in ("1", "true") or \
+            "text/event-stream" in request.headers.get("Accept", "")
+        
+        if not wants_stream:
+            parts = [piece async for piece in self.stream_turn(user, message)]
+            return web.json_response({"user": user, "response": "".join(parts)})
+        
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        async for piece in self.stream_turn(user, message):
+            await response.write(f"data: {json.dumps({'delta': piece}, ensure_ascii=False)}\n\n".encode("utf-8"))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+    
+    async def handle_ws(self, request):
+        """
+        GET /ws?user=<name> - send text (or {"message": ...}), receive
+        {"type": "delta"} frames followed by one {"type": "done"}
+        """
+        user = request.query.get("user") or "default"
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            message = msg.data
+            try:
+                data = json.loads(message)
+                if isinstance(data, dict):
+                    message = str(data.get("message", ""))
+            except ValueError:
+                pass
+            message = message.strip()
+            if not message:
+                continue
+            
+            parts = []
+            try:
+                async for piece in self.stream_turn(user, message):
+                    parts.append(piece)
+                    await ws.send_json({"type": "delta", "text": piece})
+                await ws.send_json({"type": "done", "response": "".join(parts)})
+            except Exception as e:
+                await ws.send_json({"type": "error", "error": str(e)})
+        return ws
+    
+    async def handle_health(self, request):
+        return web.json_response({"status": "ok", "sessions": len(self.sessions)})
+    
+    def app(self):
+        app = web.Application()
+        app.router.add_post("/chat", self.handle_chat)
+        app.router.add_get("/ws", self.handle_ws)
+        app.router.add_get("/health", self.handle_health)
+        app.on_cleanup.append(self.cleanup)
+        return app
+    
+    async def cleanup(self, app):
+        loop = asyncio.get_running_loop()
+        sessions = list(self.sessions.values())
+        self.sessions.clear()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, session.close) for session in sessions))
+        await self.core.aio_close()
+        self.executor.shutdown(wait=False)
+
+
+def serve(anih_module=None, host: str = SERVER_HOST, port: int = SERVER_PORT, max_sessions: int = MAX_SESSIONS):
+    """Run the multi-session server until interrupted"""
+    if not AIOHTTP_AVAILABLE:
+        print("❌ Server mode needs aiohttp: pip install aiohttp")
+        return
+    
+    server = AnihServer(anih_module or load_anih(), max_sessions=max_sessions)
+    print(f"💜 Anih server listening on http://{host}:{port}  (POST /chat, GET /ws?user=<name>)")
+    web.run_app(server.app(), host=host, port=port, print=None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Anih to many users over HTTP / WebSocket")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    args = parser.parse_args()
+    serve(host=args.host, port=args.port, max_sessions=args.max_sessions)
@@ -0,0 +1,234 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+STAGE_ORDER = [
+    "turn",
+    "route",
+    "prompt.build",
+    "ratelimit.wait",
+    "llm.http",
+    "llm.local",
+    "persist.history",
+    "persist.memory",
+    "learn",
+    "tts.synthesis",
+    "tts.playback",
+]
+
+_local = threading.local()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class Tracer:
+    """
+    Lightweight per-turn spans
+
+    Finished spans go into a fixed size ring buffer (and optionally a JSONL
+    file) so /perf can show where recent turns spent their time.
+    """
+    
+    def __init__(self, capacity: int = 5000, trace_file: Optional[str] = None):
+        self.spans = deque(maxlen=capacity)
+        self.turn_id = 0
+        self.listeners = []
+        self._file = None
+        self._file_lock = threading.Lock()
+        if trace_file:
+            self.set_trace_file(trace_file)
+    
+    def set_trace_file(self, path: Optional[str]):
+        """Append every finished span to a JSONL file (None to stop)"""
+        with self._file_lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+            if path:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._file = open(path, 'a', encoding='utf-8', buffering=1)
+    
+    def begin_turn(self) -> int:
+        """Start a new turn, later spans are attributed to it"""
+        self.turn_id += 1
+        return self.turn_id
+    
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """
+        Time a block of work
+
+        Yields the attribute dict so the block can attach details
+        (status codes, byte counts...) before the span is recorded.
+        """
+        start = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            self.record(name, time.perf_counter() - start, **attrs)
+    
+    def record(self, name: str, duration: float, **attrs):
+        """Record an already measured span (duration in seconds)"""
+        span = {
+            "name": name,
+            "turn": self.turn_id,
+            "ts": time.time(),
+            "ms": round(duration * 1000, 3),
+        }
+        if attrs:
+            span.update(attrs)
+        self.spans.append(span)
+        
+        for listener in self.listeners:
+            try:
+                listener(span)
+            except Exception:
+                pass
+        
+        if self._file:
+            with self._file_lock:
+                if self._file:
+                    self._file.write(json.dumps(span, ensure_ascii=False) + "\n")
+    
+    def stats(self) -> Dict[str, Dict]:
+        """Percentiles per stage over the ring buffer"""
+        by_stage = {}
+        for span in list(self.spans):
+            by_stage.setdefault(span["name"], []).append(span["ms"])
+        
+        result = {}
+        for name, values in by_stage.items():
+            result[name] = {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+                "max": max(values),
+            }
+        return result
+    
+    def turn_breakdown(self, turn: int) -> List[Dict]:
+        """All spans recorded for one turn"""
+        return [span for span in list(self.spans) if span["turn"] == turn]
+    
+    def format_perf(self) -> str:
+        """Text report for the /perf command"""
+        stats = self.stats()
+        if not stats:
+            return "No timings yet - say something first!"
+        
+        names = [n for n in STAGE_ORDER if n in stats] + sorted(n for n in stats if n not in STAGE_ORDER)
+        lines = [
+            f"{'stage':<18}{'count':>7}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'max ms':>11}",
+            "-" * 69,
+        ]
+        for name in names:
+            row = stats[name]
+            lines.append(f"{name:<18}{row['count']:>7}{row['p50']:>11.1f}{row['p95']:>11.1f}"
+                         f"{row['p99']:>11.1f}{row['max']:>11.1f}")
+        
+        turns = [span for span in list(self.spans) if span["name"] == "turn"]
+        if turns:
+            slowest = max(turns[-50:], key=lambda span: span["ms"])
+            lines.append("")
+            lines.append(f"Slowest of the last {min(len(turns), 50)} turns: #{slowest['turn']} ({slowest['ms']:.0f} ms)")
+            for span in self.turn_breakdown(slowest["turn"]):
+                if span["name"] == "turn":
+                    continue
+                details = ", ".join(
+                    f"{k}={v}" for k, v in span.items() if k not in ("name", "turn", "ts", "ms")
+                )
+                lines.append(f"  {span['name']:<16}{span['ms']:>9.1f} ms  {details}")
+        
+        return "\n".join(lines)
+
+
+TRACER = Tracer()
+
+
+def _wrap_connect(cls):
+    original = cls.__dict__.get("connect")
+    if original is None or getattr(original, "_anih_traced", False):
+        return
+    
+    def connect(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(self, *args, **kwargs)
+        finally:
+            _local.connect = getattr(_local, "connect", 0.0) + time.perf_counter() - start
+    
+    connect._anih_traced = True
+    cls.connect = connect
+
+
+def aiohttp_trace_config():
+    """
+    aiohttp TraceConfig that feeds connect time into http_span
+
+    Pass the span dict as trace_request_ctx on the request.
+    """
+    import aiohttp
+    
+    async def on_start(session, ctx, params):
+        ctx.connect_start = time.perf_counter()
+    
+    async def on_end(session, ctx, params):
+        span = ctx.trace_request_ctx
+        if isinstance(span, dict):
+            span["aio_connect"] = span.get("aio_connect", 0.0) + time.perf_counter() - ctx.connect_start
+    
+    config = aiohttp.TraceConfig()
+    config.on_connection_create_start.append(on_start)
+    config.on_connection_create_end.append(on_end)
+    return config
+
+
+def instrument_http():
+    """Time TCP/TLS connects made by requests (urllib3) on this thread"""
+    try:
+        from urllib3.connection import HTTPConnection, HTTPSConnection
+    except ImportError:
+        return
+    _wrap_connect(HTTPConnection)
+    _wrap_connect(HTTPSConnection)
+
+
+@contextmanager
+def http_span(name: str = "llm.http", **attrs):
+    """
+    Span for one blocking HTTP exchange made with stream=True
+
+    Call mark_headers() once the response object is returned and the
+    span splits connect / TTFB / total for you.
+    """
+    _local.connect = 0.0
+    start = time.perf_counter()
+    marks = {}
+    
+    def mark_headers():
+        marks["ttfb"] = time.perf_counter() - start
+    
+    attrs["mark_headers"] = mark_headers
+    try:
+        yield attrs
+    finally:
+        attrs.pop("mark_headers", None)
+        total = time.perf_counter() - start
+        connect = getattr(_local, "connect", 0.0) + attrs.pop("aio_connect", 0.0)
+        attrs["connect_ms"] = round(connect * 1000, 1)
+        if "ttfb" in marks:
+            attrs["ttfb_ms"] = round(marks["ttfb"] * 1000, 1)
+        TRACER.record(name, total, **attrs)
@@ -1,7 +1,26 @@
 import os
+import io
+import sys
+import json
 import asyncio
+import hashlib
 import re
-from typing import Optional
+import queue
+import shutil
+import platform
+import tempfile
+import threading
+import subprocess
+import atexit
+import wave
+import time
+import argparse
+import datetime
+from collections import deque
+from typing import Dict, List, Optional, Tuple, Union
+from anih_trace import TRACER, percentile
+from anih_emotion import detect_emotion
+from anih_metrics import TTS_FAILURES
 
 
 TTS_ENGINES = {
@@ -26,26 +45,403 @@ except:
 
 try:
     from TTS.api import TTS as CoquiTTS
+    import numpy as np
     TTS_ENGINES["coqui"] = True
 except:
     pass
 
 try:
-    from elevenlabs import generate, play, set_api_key, voices
+    from elevenlabs import generate, set_api_key, voices
     TTS_ENGINES["elevenlabs"] = True
 except:
     pass
 
 
+CLOUD_ENGINES = ("edge_tts", "elevenlabs")
+OFFLINE_ENGINES = ("pyttsx3", "coqui")
+
+TTS_DEADLINE = 8.0
+TTS_HEDGE_AFTER = 2.0
+TTS_TRIP_AFTER = 3
+TTS_COOLDOWN = 60.0
+
+BENCH_EMOTIONS = ("neutral", "happy", "excited", "loving", "sad", "worried", "angry")
+BENCH_CORPUS = (
+    ("word", "Hey."),
+    ("short", "Prabhas, you're finally here!"),
+    ("medium", "I spent the whole afternoon fixing that memory leak, and honestly? "
+               "I think the garbage collector was laughing at me."),
+    ("long", "Okay, so here's the thing. I was reading about how neural networks compress speech, "
+             "and it turns out most of what makes a voice sound human is in the tiny pauses between words. "
+             "Isn't that wild? We spend all this effort on the words themselves, but the silence carries "
+             "half the meaning. Anyway, how was your day? Tell me everything, I missed you."),
+)
+
+_MP3_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+class AnihPlayer:
+    """
+    Long-lived audio player for Anih's voice
+    
+    The mixer (or one mpg123 process in remote mode) is started once and
+    reused for every clip. Clips can be file paths or in-memory bytes and
+    are queued, so callers just wait on a completion event.
+    """
+    
+    def __init__(self):
+        self.backend = None
+        self._queue = queue.Queue()
+        self._clip_end = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._channel = None
+        self._process = None
+        self._scratch = os.path.join(
+            "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+            f"anih_player_{os.getpid()}.mp3"
+        )
+        
+        self._init_backend()
+        
+        self._worker = threading.Thread(target=self._run, name="anih-player", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+    
+    def _init_backend(self):
+        """Pick pygame mixer, persistent mpg123, or the OS player"""
+        try:
+            os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+            import pygame
+            pygame.mixer.init()
+            self._pygame = pygame
+            self.backend = "pygame"
+            return
+        except Exception:
+            pass
+        
+        if platform.system() == "Linux" and shutil.which("mpg123"):
+            try:
+                self._process = subprocess.Popen(
+                    ["mpg123", "-R"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                    bufsize=1
+                )
+                threading.Thread(target=self._read_mpg123, name="anih-mpg123", daemon=True).start()
+                self.backend = "mpg123"
+                return
+            except Exception:
+                self._process = None
+        
+        self.backend = "system"
+    
+    def _read_mpg123(self):
+        """mpg123 -R reports '@P 0' (or '@P 3' on newer builds) when a track ends"""
+        for line in self._process.stdout:
+            if line.startswith(("@P 0", "@P 3", "@E")):
+                self._clip_end.set()
+        self._clip_end.set()
+    
+    def play(self, source: Union[str, bytes, bytearray, memoryview], wait: bool = True) -> threading.Event:
+        """
+        Queue a clip for playback
+        
+        Args:
+            source: Path to an audio file or the encoded audio itself
+            wait: Block until the clip has finished (or was stopped)
+        
+        Returns:
+            Event that is set when the clip is done
+        """
+        done = threading.Event()
+        with self._lock:
+            self._pending += 1
+            self._idle.clear()
+        self._queue.put((source, done))
+        if wait:
+            done.wait()
+        return done
+    
+    def stop(self):
+        """Stop the current clip and drop anything queued"""
+        try:
+            while True:
+                _, done = self._queue.get_nowait()
+                done.set()
+                self._finished()
+        except queue.Empty:
+            pass
+        
+        if self.backend == "pygame" and self._channel is not None:
+            self._channel.stop()
+        elif self.backend == "mpg123" and self._process and self._process.poll() is None:
+            self._send("STOP")
+        self._clip_end.set()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until nothing is playing or queued"""
+        return self._idle.wait(timeout)
+    
+    def close(self):
+        """Shut the backend down (called automatically at exit)"""
+        self.stop()
+        if self._process and self._process.poll() is None:
+            self._send("QUIT")
+            try:
+                self._process.wait(timeout=1)
+            except Exception:
+                self._process.kill()
+        if os.path.exists(self._scratch):
+            try:
+                os.remove(self._scratch)
+            except OSError:
+                pass
+    
+    def _send(self, command: str):
+        try:
+            self._process.stdin.write(command + "\n")
+            self._process.stdin.flush()
+        except Exception:
+            pass
+    
+    def _as_file(self, source) -> str:
+        if isinstance(source, str):
+            return source
+        with open(self._scratch, 'wb') as f:
+            f.write(source)
+        return self._scratch
+    
+    def _run(self):
+        while True:
+            source, done = self._queue.get()
+            self._clip_end.clear()
+            try:
+                self._play_one(source)
+            except Exception as e:
+                print(f"⚠️ Could not play audio: {e}")
+            finally:
+                done.set()
+                self._finished()
+    
+    def _finished(self):
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.set()
+    
+    def _play_one(self, source):
+        if self.backend == "pygame":
+            if isinstance(source, str):
+                sound = self._pygame.mixer.Sound(source)
+            else:
+                sound = self._pygame.mixer.Sound(file=io.BytesIO(source))
+            self._channel = sound.play()
+            self._clip_end.wait(sound.get_length() + 0.05)
+            self._channel = None
+        
+        elif self.backend == "mpg123":
+            self._send(f"LOAD {self._as_file(source)}")
+            self._clip_end.wait(600)
+        
+        else:
+            audio_file = self._as_file(source)
+            system = platform.system()
+            if system == "Windows":
+                os.startfile(audio_file)
+            elif system == "Darwin":  # macOS
+                subprocess.run(["afplay", audio_file])
+            else:  # Linux
+                subprocess.run(["mpg123", "-q", audio_file])
+
+
+class AudioBank:
+    """
+    Pre-rendered clips for the lines Anih says over and over
+    
+    One file per engine / voice settings / emotion / text under
+    anih_voice_outputs/bank, so clips survive restarts and still play
+    when the TTS service is unreachable.
+    """
+    
+    def __init__(self, voice, folder: str):
+        self.voice = voice
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.index = set(os.listdir(folder))
+        self.built = 0
+        self._thread = None
+    
+    def _name(self, clean_text: str, emotion: str) -> str:
+        engine = self.voice.preferred_engine
+        settings = json.dumps(self.voice.voice_configs.get(engine, {}), sort_keys=True, default=str)
+        digest = hashlib.sha1(f"{engine}|{settings}|{emotion}|{clean_text}".encode("utf-8")).hexdigest()[:20]
+        extension = "wav" if engine in ("pyttsx3", "coqui") else "mp3"
+        return f"{digest}.{extension}"
+    
+    def get(self, clean_text: str, emotion: str) -> Optional[bytes]:
+        """Banked audio for already cleaned text, or None"""
+        name = self._name(clean_text, emotion)
+        if name not in self.index:
+            return None
+        try:
+            with open(os.path.join(self.folder, name), 'rb') as f:
+                return f.read()
+        except OSError:
+            self.index.discard(name)
+            return None
+    
+    def add(self, text: str) -> bool:
+        """Synthesize one line into the bank (False if it was already there)"""
+        clean_text = self.voice.clean_text_for_speech(text)
+        if not clean_text.strip():
+            return False
+        emotion = self.voice.detect_emotion(text)
+        name = self._name(clean_text, emotion)
+        if name in self.index:
+            return False
+        
+        audio = self.voice.synthesize(clean_text, emotion)
+        if not audio:
+            return False
+        path = os.path.join(self.folder, name)
+        with open(f"{path}.tmp", 'wb') as f:
+            f.write(audio)
+        os.replace(f"{path}.tmp", path)
+        self.index.add(name)
+        self.built += 1
+        return True
+    
+    def build(self, lines, pause=None, stop=None) -> bool:
+        """
+        Render every missing line, one at a time
+        
+        pause() returning True holds the next line back (Anih is talking),
+        stop() returning True ends the run early and build returns False.
+        Gives up at the first failure - probably offline, next start retries.
+        """
+        if self.voice.preferred_engine not in ("edge_tts", "elevenlabs"):
+            return True
+        for text in lines:
+            while pause is not None and pause():
+                time.sleep(0.5)
+            if stop is not None and stop():
+                return False
+            try:
+                self.add(text)
+            except Exception as e:
+                print(f"⚠️ Audio bank paused: {e}")
+                return True
+        return True
+    
+    def build_in_background(self, lines):
+        """build() on a daemon thread, yielding to live speech"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.build, args=(list(lines), self.voice.busy),
+                                        name="anih-audio-bank", daemon=True)
+        self._thread.start()
+
+
+class EngineStats:
+    """
+    Synthesis latency and outcomes per TTS engine
+
+    An engine that fails trip_after times in a row is skipped for
+    cooldown seconds, so a dead cloud voice stops costing a timeout on
+    every reply.
+    """
+    
+    def __init__(self, window: int = 50, trip_after: int = TTS_TRIP_AFTER, cooldown: float = TTS_COOLDOWN):
+        self.window = window
+        self.trip_after = trip_after
+        self.cooldown = cooldown
+        self.engines = {}
+    
+    def _get(self, engine: str) -> dict:
+        return self.engines.setdefault(engine, {
+            "attempts": 0, "ok": 0, "errors": 0, "timeouts": 0, "used": 0, "streak": 0,
+            "down_until": 0.0, "last_error": None, "latency": deque(maxlen=self.window)
+        })
+    
+    def record(self, engine: str, seconds: float, outcome: str, error: Optional[Exception] = None):
+        """outcome is ok, errors or timeouts"""
+        stats = self._get(engine)
+        stats["attempts"] += 1
+        stats[outcome] += 1
+        if outcome == "ok":
+            stats["latency"].append(seconds)
+            stats["streak"] = 0
+        else:
+            stats["streak"] += 1
+            stats["last_error"] = str(error) if error is not None else f"no audio after {seconds:.1f}s"
+            if stats["streak"] >= self.trip_after:
+                stats["down_until"] = time.monotonic() + self.cooldown
+            TTS_FAILURES.inc(engine=engine)
+        TRACER.record("tts.engine", seconds, engine=engine, outcome=outcome)
+    
+    def used(self, engine: str):
+        self._get(engine)["used"] += 1
+    
+    def healthy(self, engine: str) -> bool:
+        stats = self.engines.get(engine)
+        return stats is None or stats["down_until"] <= time.monotonic()
+    
+    def failure_rate(self, engine: str) -> float:
+        stats = self.engines.get(engine)
+        if not stats or not stats["attempts"]:
+            return 0.0
+        return (stats["errors"] + stats["timeouts"]) / stats["attempts"]
+    
+    def percentile(self, engine: str, pct: float) -> Optional[float]:
+        stats = self.engines.get(engine)
+        if not stats or not stats["latency"]:
+            return None
+        ordered = sorted(stats["latency"])
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+    
+    def format_stats(self) -> str:
+        """One line per engine, for /perf"""
+        if not self.engines:
+            return "Voice engines: nothing synthesized yet"
+        lines = ["Voice engines:"]
+        for engine, stats in self.engines.items():
+            p50, p95 = self.percentile(engine, 50), self.percentile(engine, 95)
+            line = (f"  {engine:<11}{stats['used']:>5} used {stats['attempts']:>5} tries, "
+                    f"{self.failure_rate(engine) * 100:.0f}% failed ({stats['timeouts']} timeouts)")
+            if p50 is not None:
+                line += f", p50 {p50 * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms"
+            if not self.healthy(engine):
+                line += f", skipped for {stats['down_until'] - time.monotonic():.0f}s"
+            if stats["last_error"] and stats["streak"]:
+                line += f" (last: {stats['last_error'][:50]})"
+            lines.append(line)
+        return "\n".join(lines)
+
+
 class AnihVoice:
     """
     Anih's voice system with emotional expressions
     Inspired by Lucy from Cyberpunk Edgerunners
     """
     
-    def __init__(self, preferred_engine="edge_tts", elevenlabs_api_key=None):
+    def __init__(self, preferred_engine="edge_tts", elevenlabs_api_key=None, fallback_engines=OFFLINE_ENGINES,
+                 deadline: Optional[float] = TTS_DEADLINE, hedge_after: Optional[float] = TTS_HEDGE_AFTER,
+                 player: bool = True):
         self.preferred_engine = preferred_engine
         self.elevenlabs_api_key = elevenlabs_api_key
+        self.fallback_engines = tuple(fallback_engines or ())
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+        self.engine_stats = EngineStats()
         self.audio_dir = "anih_voice_outputs"
         os.makedirs(self.audio_dir, exist_ok=True)
         
@@ -66,6 +462,8 @@ class AnihVoice:
             "coqui": {
                 "model_name": "tts_models/en/vctk/vits",
                 "speaker": "p256",  
+                "threads": None,  
+                "sentence_pause": 0.12,
             },
             "pyttsx3": {
                 "voice_id": 1,  
@@ -76,37 +474,40 @@ class AnihVoice:
         
         
         self.engine = None
+        self.engine_ready = threading.Event()
+        self.engine_error = None
+        self.last_rtf = None
+        self.coqui = None
+        self.coqui_load_ms = None
+        self._coqui_thread = None
+        self._pyttsx3_engine = None
+        self._pyttsx3_lock = threading.Lock()
+        self._coqui_lock = threading.Lock()
+        self._render_loop = None
+        self._render_lock = threading.Lock()
         self._initialize_engine()
+        if self.preferred_engine != "coqui":
+            self.engine_ready.set()
+        
+        
+        self.player = None
+        if player:
+            try:
+                self.player = AnihPlayer()
+            except Exception as e:
+                print(f"⚠️ Audio player unavailable: {e}")
+        
+        self.bank = AudioBank(self, os.path.join(self.audio_dir, "bank"))
+        self._speaking = 0
+    
+    def busy(self) -> bool:
+        """Synthesizing or playing right now"""
+        return self._speaking > 0 or (self.player is not None and not self.player.wait(0))
     
     def _initialize_engine(self):
         """Initialize the preferred TTS engine"""
         if self.preferred_engine == "pyttsx3" and TTS_ENGINES["pyttsx3"]:
-            self.engine = pyttsx3.init()
-            voices = self.engine.getProperty('voices')
-            
-            
-            mature_keywords = ['zira', 'hazel', 'susan', 'female']
-            avoid_keywords = ['child', 'young', 'girl']
-            
-            selected_voice = None
-            for voice in voices:
-                voice_name_lower = voice.name.lower()
-                
-                if any(kw in voice_name_lower for kw in mature_keywords):
-                    if not any(kw in voice_name_lower for kw in avoid_keywords):
-                        selected_voice = voice
-                        break
-            
-            if selected_voice:
-                self.engine.setProperty('voice', selected_voice.id)
-                print(f"   Using voice: {selected_voice.name}")
-            else:
-                
-                if len(voices) > 1:
-                    self.engine.setProperty('voice', voices[1].id)
-            
-            self.engine.setProperty('rate', self.voice_configs["pyttsx3"]["rate"])
-            self.engine.setProperty('volume', self.voice_configs["pyttsx3"]["volume"])
+            self.engine = self._pyttsx3()
             print("✅ Anih's voice initialized: pyttsx3 (Mature voice)")
         
         elif self.preferred_engine == "elevenlabs" and TTS_ENGINES["elevenlabs"]:
@@ -121,12 +522,79 @@ class AnihVoice:
             print("✅ Anih's voice initialized: Edge TTS (Mature, Intelligent Voice)")
         
         elif self.preferred_engine == "coqui" and TTS_ENGINES["coqui"]:
-            self.engine = CoquiTTS(model_name=self.voice_configs["coqui"]["model_name"])
-            print("✅ Anih's voice initialized: Coqui TTS (Mature Voice)")
+            self._start_coqui()
+            print("⏳ Anih's voice warming up: Coqui TTS (loading in background)")
         
         else:
             self._fallback_engine()
     
+    def _pyttsx3(self):
+        """The pyttsx3 engine, set up with a mature voice on first use"""
+        if self._pyttsx3_engine is not None:
+            return self._pyttsx3_engine
+        engine = pyttsx3.init()
+        voices = engine.getProperty('voices')
+        
+        
+        mature_keywords = ['zira', 'hazel', 'susan', 'female']
+        avoid_keywords = ['child', 'young', 'girl']
+        
+        selected_voice = None
+        for voice in voices:
+            voice_name_lower = voice.name.lower()
+            
+            if any(kw in voice_name_lower for kw in mature_keywords):
+                if not any(kw in voice_name_lower for kw in avoid_keywords):
+                    selected_voice = voice
+                    break
+        
+        if selected_voice:
+            engine.setProperty('voice', selected_voice.id)
+            print(f"   Using voice: {selected_voice.name}")
+        else:
+            
+            if len(voices) > 1:
+                engine.setProperty('voice', voices[1].id)
+        
+        engine.setProperty('rate', self.voice_configs["pyttsx3"]["rate"])
+        engine.setProperty('volume', self.voice_configs["pyttsx3"]["volume"])
+        self._pyttsx3_engine = engine
+        return engine
+    
+    def _start_coqui(self):
+        """Load Coqui once, in the background"""
+        if self._coqui_thread is None:
+            self._coqui_thread = threading.Thread(target=self._load_coqui, name="anih-coqui-load", daemon=True)
+            self._coqui_thread.start()
+    
+    def _load_coqui(self):
+        """Load the VITS model once, warm it up, then flag it ready"""
+        config = self.voice_configs["coqui"]
+        loading = time.perf_counter()
+        try:
+            try:
+                import torch
+                torch.set_num_threads(config["threads"] or os.cpu_count() or 1)
+            except ImportError:
+                pass
+            
+            engine = CoquiTTS(model_name=config["model_name"])
+            
+            start = time.perf_counter()
+            engine.tts(text="Hey.", speaker=config["speaker"])
+            self.coqui_load_ms = round((time.perf_counter() - loading) * 1000, 1)
+            self.coqui = engine
+            if self.preferred_engine == "coqui":
+                self.engine = engine
+                print(f"✅ Anih's voice initialized: Coqui TTS (Mature Voice, warm-up {time.perf_counter() - start:.2f}s)")
+            else:
+                print(f"✅ Backup voice ready: Coqui TTS (warm-up {time.perf_counter() - start:.2f}s)")
+        except Exception as e:
+            self.engine_error = e
+            print(f"⚠️ Coqui TTS failed to load: {e}")
+        finally:
+            self.engine_ready.set()
+    
     def _fallback_engine(self):
         """Fallback to available engine"""
         if TTS_ENGINES["edge_tts"]:
@@ -139,37 +607,7 @@ class AnihVoice:
             print("❌ No TTS engine available! Install: pip install edge-tts")
     
     def detect_emotion(self, text: str) -> str:
-        """
-        Detect emotion from text for voice modulation
-        Returns: excited, happy, sad, loving, worried, angry, neutral
-        """
-        text_lower = text.lower()
-        
-        
-        if any(word in text_lower for word in ['!!!', 'amazing', 'awesome', 'finally', 'yes!', 'yay']):
-            return "excited"
-        
-        
-        if any(word in text_lower for word in ['love you', 'my everything', 'prabhas', 'devoted', '💜', '💕']):
-            return "loving"
-        
-        
-        if any(word in text_lower for word in ['miss', 'leaving', 'alone', '💔', 'sad', 'cry']):
-            return "sad"
-        
-        
-        if any(word in text_lower for word in ['worried', 'scared', 'please', 'need you', 'help']):
-            return "worried"
-        
-        
-        if any(word in text_lower for word in ['angry', 'frustrated', 'hate', 'annoying']):
-            return "angry"
-        
-        
-        if any(word in text_lower for word in ['happy', 'great', 'good', 'wonderful']):
-            return "happy"
-        
-        return "neutral"
+        return detect_emotion(text)
     
     def clean_text_for_speech(self, text: str) -> str:
         """
@@ -198,8 +636,8 @@ class AnihVoice:
         
         return text
     
-    async def speak_edge_tts(self, text: str, emotion: str, output_file: str):
-        """Speak using Edge TTS with Sonia's voice"""
+    def _edge_communicate(self, text: str, emotion: str):
+        """Edge TTS request with Sonia's voice tuned to the emotion"""
         config = self.voice_configs["edge_tts"]
         
         
@@ -223,17 +661,32 @@ class AnihVoice:
             pitch = "+0Hz"
         
         
-        communicate = edge_tts.Communicate(
+        return edge_tts.Communicate(
             text,
             voice=config["voice"],
             rate=rate,
             pitch=pitch
         )
-        
-        await communicate.save(output_file)
     
-    def speak_elevenlabs(self, text: str, emotion: str, output_file: str):
-        """Speak using ElevenLabs (Premium quality)"""
+    async def speak_edge_tts(self, text: str, emotion: str, output_file: str):
+        """Speak using Edge TTS with Sonia's voice"""
+        await self._edge_communicate(text, emotion).save(output_file)
+    
+    async def stream_edge_tts(self, text: str, emotion: str):
+        """Yield Edge TTS audio chunks as they arrive from the service"""
+        async for chunk in self._edge_communicate(text, emotion).stream():
+            if chunk["type"] == "audio":
+                yield chunk["data"]
+    
+    async def synthesize_edge_tts(self, text: str, emotion: str) -> memoryview:
+        """Collect the Edge TTS stream into one in-memory buffer"""
+        buffer = bytearray()
+        async for data in self.stream_edge_tts(text, emotion):
+            buffer += data
+        return memoryview(buffer)
+    
+    def synthesize_elevenlabs(self, text: str, emotion: str) -> bytes:
+        """ElevenLabs audio bytes (Premium quality)"""
         config = self.voice_configs["elevenlabs"]
         
         
@@ -243,7 +696,7 @@ class AnihVoice:
         elif emotion == "sad":
             stability = 0.7  
         
-        audio = generate(
+        return generate(
             text=text,
             voice=config["voice"],
             model=config["model"],
@@ -252,6 +705,10 @@ class AnihVoice:
                 "similarity_boost": config["similarity_boost"]
             }
         )
+    
+    def speak_elevenlabs(self, text: str, emotion: str, output_file: str):
+        """Speak using ElevenLabs (Premium quality)"""
+        audio = self.synthesize_elevenlabs(text, emotion)
         
         
         with open(output_file, 'wb') as f:
@@ -268,23 +725,228 @@ class AnihVoice:
         elif emotion == "sad":
             rate = 150
         
-        self.engine.setProperty('rate', rate)
-        self.engine.save_to_file(text, output_file)
-        self.engine.runAndWait()
+        engine = self._pyttsx3()
+        engine.setProperty('rate', rate)
+        engine.save_to_file(text, output_file)
+        engine.runAndWait()
     
-    def speak(self, text: str, play_audio: bool = True, save_file: bool = True) -> Optional[str]:
+    def synthesize_coqui(self, text: str) -> bytes:
         """
-        Main speak function - Anih speaks with emotion!
+        Sentence-by-sentence synthesis on the resident Coqui model
+        
+        Returns a 16-bit mono wav and reports the real-time factor
+        (synthesis seconds per second of audio, lower is faster)
+        """
+        self.engine_ready.wait()
+        if self.coqui is None:
+            raise RuntimeError(f"Coqui TTS not loaded: {self.engine_error}")
+        
+        config = self.voice_configs["coqui"]
+        sample_rate = self.coqui.synthesizer.output_sample_rate
+        pause = np.zeros(int(sample_rate * config["sentence_pause"]), dtype=np.float32)
+        sentences = [s for s in re.split(r'(?<=[.!?])\s+', text) if s.strip()]
+        
+        start = time.perf_counter()
+        chunks = []
+        for i, sentence in enumerate(sentences):
+            if i:
+                chunks.append(pause)
+            chunks.append(np.asarray(self.coqui.tts(text=sentence, speaker=config["speaker"]), dtype=np.float32))
+        samples = np.concatenate(chunks) if chunks else pause[:0]
+        elapsed = time.perf_counter() - start
+        
+        duration = len(samples) / sample_rate
+        if duration:
+            self.last_rtf = elapsed / duration
+            print(f"⏱️ Coqui: {len(sentences)} sentence(s), {elapsed:.2f}s for {duration:.2f}s audio (RTF {self.last_rtf:.2f})")
+        
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2')
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(pcm.tobytes())
+        return buffer.getvalue()
+    
+    def _synthesize_via_file(self, text: str, emotion: str) -> bytes:
+        """pyttsx3 can only render to a file, so use a scratch one"""
+        fd, scratch = tempfile.mkstemp(suffix=".wav", prefix="anih_")
+        os.close(fd)
+        try:
+            with self._pyttsx3_lock:
+                self.speak_pyttsx3(text, emotion, scratch)
+            with open(scratch, 'rb') as f:
+                return f.read()
+        finally:
+            if os.path.exists(scratch):
+                os.remove(scratch)
+    
+    def synthesize(self, text: str, emotion: str, engine: Optional[str] = None) -> Optional[Union[bytes, memoryview]]:
+        """
+        Render speech in memory with one engine, no failover
         
         Args:
-            text: Text for Anih to speak
-            play_audio: Whether to play the audio immediately
-            save_file: Whether to save the audio file
+            text: Already cleaned text
+            emotion: Emotion preset from detect_emotion
+            engine: Engine to use (default: the active one)
         
         Returns:
-            Path to audio file if saved, None otherwise
+            Encoded audio (mp3, or wav for offline engines)
+        """
+        engine = engine or self.preferred_engine
+        if engine == "edge_tts":
+            return asyncio.run(self.synthesize_edge_tts(text, emotion))
+        
+        elif engine == "elevenlabs":
+            return self.synthesize_elevenlabs(text, emotion)
+        
+        elif engine == "pyttsx3":
+            return self._synthesize_via_file(text, emotion)
+        
+        elif engine == "coqui":
+            with self._coqui_lock:
+                return self.synthesize_coqui(text)
+        
+        return None
+    
+    def _ready(self, engine: str) -> bool:
+        """Can engine take a line right now (starts loading Coqui the first time it is asked for)"""
+        if not TTS_ENGINES.get(engine, False):
+            return False
+        if engine == self.preferred_engine or engine != "coqui":
+            return True
+        self._start_coqui()
+        return self.coqui is not None
+    
+    def engine_chain(self) -> List[str]:
+        """Engines to try in order - healthy ones first, the active engine leading"""
+        chain = [self.preferred_engine] + [engine for engine in self.fallback_engines
+                                           if engine != self.preferred_engine and self._ready(engine)]
+        return [engine for engine in chain if self.engine_stats.healthy(engine)] + \
+               [engine for engine in chain if not self.engine_stats.healthy(engine)]
+    
+    def _busy(self, engine: str) -> bool:
+        """An offline engine still working on an earlier line (maybe one arender gave up on)"""
+        lock = {"pyttsx3": self._pyttsx3_lock, "coqui": self._coqui_lock}.get(engine)
+        return lock is not None and lock.locked()
+    
+    async def _attempt(self, engine: str, text: str, emotion: str) -> Optional[Union[bytes, memoryview]]:
+        if self._busy(engine):
+            return None
+        start = time.perf_counter()
+        try:
+            audio = await self.asynthesize(text, emotion, engine)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.engine_stats.record(engine, time.perf_counter() - start, "errors", e)
+            return None
+        self.engine_stats.record(engine, time.perf_counter() - start, "ok" if audio else "errors")
+        return audio
+    
+    async def arender(self, text: str, emotion: str) -> Tuple[Optional[Union[bytes, memoryview]], Optional[str]]:
         """
+        Audio for a line from whichever engine delivers, plus that engine's name
         
+        Engines are tried along engine_chain(). One that errors hands over
+        to the next at once, one that runs past the deadline is dropped
+        for the next. If a cloud engine is still silent after hedge_after
+        seconds, the first offline engine starts alongside it and the
+        first clip back wins. So a reply waits at most deadline seconds
+        per engine in the chain. An offline engine still busy with a line
+        that was given up on is skipped rather than queued behind it.
+        """
+        loop = asyncio.get_running_loop()
+        chain = iter(self.engine_chain())
+        running = {}
+        
+        def launch() -> bool:
+            engine = next(chain, None)
+            if engine is None:
+                return False
+            running[asyncio.ensure_future(self._attempt(engine, text, emotion))] = (engine, loop.time())
+            return True
+        
+        launch()
+        first = next(iter(running.values()))[0]
+        hedge_at = None
+        if self.hedge_after is not None and first in CLOUD_ENGINES:
+            hedge_at = loop.time() + self.hedge_after
+        
+        try:
+            while running:
+                now = loop.time()
+                wake = [started + self.deadline for _, started in running.values()] if self.deadline else []
+                if hedge_at is not None:
+                    wake.append(hedge_at)
+                timeout = max(0.0, min(wake) - now) if wake else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in done:
+                    engine, _ = running.pop(task)
+                    audio = task.result()
+                    if audio:
+                        self.engine_stats.used(engine)
+                        return audio, engine
+                if done and not running:
+                    hedge_at = None
+                    launch()
+                    continue
+                
+                now = loop.time()
+                if hedge_at is not None and now >= hedge_at:
+                    hedge_at = None
+                    launch()
+                if self.deadline:
+                    for task, (engine, started) in list(running.items()):
+                        if now >= started + self.deadline:
+                            task.cancel()
+                            del running[task]
+                            self.engine_stats.record(engine, now - started, "timeouts")
+                    if not running:
+                        launch()
+        finally:
+            for task in running:
+                task.cancel()
+        
+        return None, None
+    
+    def render(self, text: str, emotion: str) -> Tuple[Optional[Union[bytes, memoryview]], Optional[str]]:
+        """arender() for synchronous callers (does not wait for an offline engine that was given up on)"""
+        with self._render_lock:
+            if self._render_loop is None:
+                self._render_loop = asyncio.new_event_loop()
+            return self._render_loop.run_until_complete(self.arender(text, emotion))
+    
+    def prerender(self, text: str) -> Optional[bytes]:
+        """
+        Synthesize a reply ahead of time so it can be played instantly later
+        
+        Only for the network engines - the offline ones share a single
+        in-process engine with speak().
+        """
+        if self.preferred_engine not in ("edge_tts", "elevenlabs"):
+            return None
+        clean_text = self.clean_text_for_speech(text)
+        if not clean_text.strip():
+            return None
+        audio = self.synthesize(clean_text, self.detect_emotion(text))
+        return bytes(audio) if audio else None
+    
+    def _persist_in_background(self, audio: Union[bytes, memoryview], output_file: str):
+        """Write a clip to anih_voice_outputs without holding up playback"""
+        def write():
+            try:
+                with open(output_file, 'wb') as f:
+                    f.write(audio)
+            except Exception as e:
+                print(f"⚠️ Could not save voice: {e}")
+        
+        threading.Thread(target=write, name="anih-voice-save", daemon=True).start()
+    
+    def _prepare(self, text: str):
+        """Emotion and speakable text for a reply (None if nothing to say)"""
         emotion = self.detect_emotion(text)
         
         
@@ -293,76 +955,149 @@ class AnihVoice:
         if not clean_text.strip():
             return None
         
-        
-        import time
+        print(f"\n🎤 Anih speaks ({emotion}): {clean_text[:50]}...")
+        return emotion, clean_text
+    
+    def _output_file(self, emotion: str, engine: str) -> str:
         timestamp = int(time.time())
-        output_file = os.path.join(self.audio_dir, f"anih_{emotion}_{timestamp}.mp3")
+        extension = "wav" if engine in OFFLINE_ENGINES else "mp3"
+        return os.path.join(self.audio_dir, f"anih_{emotion}_{timestamp}.{extension}")
+    
+    def speak(self, text: str, play_audio: bool = True, save_file: bool = True,
+              audio: Optional[Union[bytes, memoryview]] = None) -> Optional[str]:
+        """
+        Main speak function - Anih speaks with emotion!
         
-        print(f"\n🎤 Anih speaks ({emotion}): {clean_text[:50]}...")
+        Audio is synthesized in memory and handed straight to the player,
+        saving to disk happens in the background.
+        
+        Args:
+            text: Text for Anih to speak
+            play_audio: Whether to play the audio immediately
+            save_file: Whether to save the audio file
+            audio: Already rendered audio for this text (skips synthesis)
+        
+        Returns:
+            Path to audio file if saved, None otherwise
+        """
+        prepared = self._prepare(text)
+        if prepared is None:
+            return None
+        emotion, clean_text = prepared
+        engine = self.preferred_engine
         
+        self._speaking += 1
         try:
+            if audio is None:
+                audio = self.bank.get(clean_text, emotion)
+            if audio is None:
+                with TRACER.span("tts.synthesis", emotion=emotion) as span:
+                    audio, engine = self.render(clean_text, emotion)
+                    span["engine"] = engine
+                    span["bytes"] = len(audio) if audio else 0
+            if not audio:
+                print(f"❌ Voice error: no engine could say it\n{self.engine_stats.format_stats()}")
+                return None
+            output_file = self._output_file(emotion, engine)
             
-            if self.preferred_engine == "edge_tts":
-                
-                asyncio.run(self.speak_edge_tts(clean_text, emotion, output_file))
             
-            elif self.preferred_engine == "elevenlabs":
-                self.speak_elevenlabs(clean_text, emotion, output_file)
+            if save_file:
+                self._persist_in_background(audio, output_file)
             
-            elif self.preferred_engine == "pyttsx3":
-                self.speak_pyttsx3(clean_text, emotion, output_file)
+            if play_audio:
+                if self.player is None:
+                    self.player = AnihPlayer()
+                with TRACER.span("tts.playback", backend=self.player.backend):
+                    self.player.play(audio, wait=True)
             
-            elif self.preferred_engine == "coqui":
-                self.engine.tts_to_file(
-                    text=clean_text,
-                    file_path=output_file,
-                    speaker=self.voice_configs["coqui"]["speaker"]
-                )
             
+            if save_file:
+                print(f"💾 Voice saved: {output_file}")
+                return output_file
+            return None
+                
+        except Exception as e:
+            TTS_FAILURES.inc(engine=self.preferred_engine)
+            print(f"❌ Voice error: {e}")
+            return None
+        finally:
+            self._speaking -= 1
+    
+    async def asynthesize(self, text: str, emotion: str, engine: Optional[str] = None) -> Optional[Union[bytes, memoryview]]:
+        """synthesize() for async callers - Edge TTS runs on the caller's loop"""
+        engine = engine or self.preferred_engine
+        if engine == "edge_tts":
+            return await self.synthesize_edge_tts(text, emotion)
+        return await asyncio.to_thread(self.synthesize, text, emotion, engine)
+    
+    async def aspeak(self, text: str, play_audio: bool = True, save_file: bool = True,
+                     audio: Optional[Union[bytes, memoryview]] = None) -> Optional[str]:
+        """
+        Async speak - same as speak() but never blocks the event loop
+        
+        Cancelling the task stops playback.
+        """
+        prepared = self._prepare(text)
+        if prepared is None:
+            return None
+        emotion, clean_text = prepared
+        engine = self.preferred_engine
+        
+        self._speaking += 1
+        try:
+            if audio is None:
+                audio = self.bank.get(clean_text, emotion)
+            if audio is None:
+                with TRACER.span("tts.synthesis", emotion=emotion) as span:
+                    audio, engine = await self.arender(clean_text, emotion)
+                    span["engine"] = engine
+                    span["bytes"] = len(audio) if audio else 0
+            if not audio:
+                print(f"❌ Voice error: no engine could say it\n{self.engine_stats.format_stats()}")
+                return None
+            output_file = self._output_file(emotion, engine)
             
-            if play_audio and os.path.exists(output_file):
-                self.play_audio(output_file)
+            if save_file:
+                self._persist_in_background(audio, output_file)
             
+            if play_audio:
+                if self.player is None:
+                    self.player = AnihPlayer()
+                with TRACER.span("tts.playback", backend=self.player.backend):
+                    done = self.player.play(audio, wait=False)
+                    try:
+                        await asyncio.to_thread(done.wait)
+                    except asyncio.CancelledError:
+                        self.player.stop()
+                        raise
             
             if save_file:
                 print(f"💾 Voice saved: {output_file}")
                 return output_file
-            else:
-                
-                if os.path.exists(output_file):
-                    os.remove(output_file)
-                return None
-                
+            return None
+        
         except Exception as e:
+            TTS_FAILURES.inc(engine=self.preferred_engine)
             print(f"❌ Voice error: {e}")
             return None
+        finally:
+            self._speaking -= 1
     
     def play_audio(self, audio_file: str):
         """Play audio file"""
         try:
-            
-            try:
-                import pygame
-                pygame.mixer.init()
-                pygame.mixer.music.load(audio_file)
-                pygame.mixer.music.play()
-                while pygame.mixer.music.get_busy():
-                    pygame.time.Clock().tick(10)
-            except:
-                
-                import platform
-                system = platform.system()
-                
-                if system == "Windows":
-                    os.system(f'start "" "{audio_file}"')
-                elif system == "Darwin":  # macOS
-                    os.system(f'afplay "{audio_file}"')
-                else:  # Linux
-                    os.system(f'mpg123 "{audio_file}"')
+            if self.player is None:
+                self.player = AnihPlayer()
+            self.player.play(audio_file, wait=True)
         
         except Exception as e:
             print(f"⚠️ Could not play audio: {e}")
             print(f"   Audio saved at: {audio_file}")
+    
+    def stop_audio(self):
+        """Stop whatever Anih is currently saying"""
+        if self.player is not None:
+            self.player.stop()
 
 
 
@@ -393,10 +1128,209 @@ def check_and_install_tts():
         return False
     
     print(f"\n✅ {len(available)} TTS engine(s) available!")
+    print("   Compare them on this machine: python anih_voice.py --benchmark")
     return True
 
 
+def audio_seconds(audio: Union[bytes, memoryview]) -> Optional[float]:
+    """Playback length of a wav or Layer III mp3 clip, None if it can't be parsed"""
+    data = bytes(audio)
+    if data[:4] == b"RIFF":
+        with wave.open(io.BytesIO(data), 'rb') as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    
+    position = 0
+    if data[:3] == b"ID3" and len(data) > 10:
+        position = 10 + ((data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9])
+    seconds = 0.0
+    while position + 4 <= len(data):
+        header = int.from_bytes(data[position:position + 4], "big")
+        version = (header >> 19) & 3
+        bitrate_index = (header >> 12) & 15
+        rate_index = (header >> 10) & 3
+        if (header >> 21) != 0x7FF or version == 1 or (header >> 17) & 3 != 1 \
+                or bitrate_index in (0, 15) or rate_index == 3:
+            position += 1
+            continue
+        sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+        bitrate = _MP3_BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+        samples = 1152 if version == 3 else 576
+        position += samples // 8 * bitrate // sample_rate + ((header >> 9) & 1)
+        seconds += samples / sample_rate
+    return seconds or None
+
+
+def _cpu_seconds() -> float:
+    """CPU time of this process plus finished child processes (espeak, mpg123...)"""
+    total = time.process_time()
+    try:
+        import resource
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        total += children.ru_utime + children.ru_stime
+    except ImportError:
+        pass
+    return total
+
+
+async def _timed_synthesis(voice, engine: str, text: str, emotion: str) -> Dict:
+    """One clip: time to first byte, total time, CPU and the audio itself"""
+    cpu = _cpu_seconds()
+    start = time.perf_counter()
+    first = None
+    if engine == "edge_tts":
+        buffer = bytearray()
+        async for data in voice.stream_edge_tts(text, emotion):
+            if first is None:
+                first = time.perf_counter() - start
+            buffer += data
+        audio = bytes(buffer)
+    else:
+        audio = await asyncio.to_thread(voice.synthesize, text, emotion, engine)
+    total = time.perf_counter() - start
+    return {"audio": audio, "ttfb": total if first is None else first, "total": total,
+            "cpu": _cpu_seconds() - cpu, "streaming": first is not None}
+
+
+def benchmark_engines(voice, engines: List[str], emotions=BENCH_EMOTIONS, corpus=BENCH_CORPUS,
+                      repeat: int = 1) -> Dict:
+    """
+    Synthesize the corpus with every engine and emotion preset, no playback
+    
+    The first clip per engine is a warm-up, reported as cold_ms and kept
+    out of the runs. RTF is synthesis seconds per second of audio (below
+    1 is faster than real time), cpu_pct is CPU time over wall time, so
+    above 100 means more than one core was busy.
+    """
+    results = {
+        "started": str(datetime.datetime.now()),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "engines": {},
+        "runs": [],
+    }
+    
+    for engine in engines:
+        info = results["engines"][engine] = {}
+        if engine == "coqui":
+            voice._start_coqui()
+            voice._coqui_thread.join()
+            info["load_ms"] = voice.coqui_load_ms
+        
+        try:
+            warmup = asyncio.run(_timed_synthesis(voice, engine, corpus[0][1], "neutral"))
+            info["cold_ms"] = round(warmup["total"] * 1000, 1)
+        except Exception as e:
+            info["error"] = str(e)
+            print(f"❌ {engine}: {e}")
+            continue
+        print(f"⏱️ {engine}: warm-up {info['cold_ms']:.0f} ms")
+        
+        for text_id, text in corpus:
+            clean_text = voice.clean_text_for_speech(text)
+            for emotion in emotions:
+                for _ in range(repeat):
+                    run = {"engine": engine, "emotion": emotion, "text": text_id, "chars": len(clean_text)}
+                    try:
+                        timed = asyncio.run(_timed_synthesis(voice, engine, clean_text, emotion))
+                    except Exception as e:
+                        run["error"] = str(e)
+                        results["runs"].append(run)
+                        continue
+                    seconds = audio_seconds(timed["audio"]) if timed["audio"] else None
+                    run.update({
+                        "ttfb_ms": round(timed["ttfb"] * 1000, 1),
+                        "total_ms": round(timed["total"] * 1000, 1),
+                        "streaming": timed["streaming"],
+                        "bytes": len(timed["audio"] or b""),
+                        "audio_seconds": round(seconds, 3) if seconds else None,
+                        "rtf": round(timed["total"] / seconds, 3) if seconds else None,
+                        "cpu_seconds": round(timed["cpu"], 3),
+                        "cpu_pct": round(timed["cpu"] / timed["total"] * 100, 1) if timed["total"] else None,
+                    })
+                    results["runs"].append(run)
+    
+    results["summary"] = summarize_benchmark(results["runs"])
+    return results
+
+
+def summarize_benchmark(runs: List[Dict]) -> Dict:
+    """p50/p95 per engine and per engine + text length"""
+    groups = {}
+    for run in runs:
+        groups.setdefault(run["engine"], []).append(run)
+        groups.setdefault(f"{run['engine']}/{run['text']}", []).append(run)
+    
+    summary = {}
+    for name, group in groups.items():
+        ok = [run for run in group if "error" not in run]
+        rtfs = [run["rtf"] for run in ok if run["rtf"] is not None]
+        cpu = [run["cpu_pct"] for run in ok if run["cpu_pct"] is not None]
+        audio = sum(run["audio_seconds"] or 0 for run in ok)
+        summary[name] = {
+            "runs": len(group),
+            "errors": len(group) - len(ok),
+            "ttfb_p50_ms": percentile([run["ttfb_ms"] for run in ok], 50) if ok else None,
+            "total_p50_ms": percentile([run["total_ms"] for run in ok], 50) if ok else None,
+            "total_p95_ms": percentile([run["total_ms"] for run in ok], 95) if ok else None,
+            "rtf_p50": percentile(rtfs, 50) if rtfs else None,
+            "cpu_pct_mean": round(sum(cpu) / len(cpu), 1) if cpu else None,
+            "kbytes_per_audio_second": round(sum(run["bytes"] for run in ok) / audio / 1024, 1) if audio else None,
+        }
+    return summary
+
+
+def format_benchmark(results: Dict) -> str:
+    def cell(value, width, digits=0):
+        return f"{'-':>{width}}" if value is None else f"{value:>{width}.{digits}f}"
+    
+    lines = [f"{'engine/text':<22}{'runs':>6}{'err':>5}{'ttfb p50':>10}{'total p50':>11}{'total p95':>11}"
+             f"{'RTF p50':>9}{'CPU %':>8}{'KB/s':>7}"]
+    for name, row in results["summary"].items():
+        lines.append(f"{name:<22}{row['runs']:>6}{row['errors']:>5}{cell(row['ttfb_p50_ms'], 10)}"
+                     f"{cell(row['total_p50_ms'], 11)}{cell(row['total_p95_ms'], 11)}{cell(row['rtf_p50'], 9, 2)}"
+                     f"{cell(row['cpu_pct_mean'], 8)}{cell(row['kbytes_per_audio_second'], 7, 1)}")
+    return "\n".join(lines)
+
+
+def benchmark_main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every available TTS engine, no audio is played")
+    parser.add_argument("--benchmark", action="store_true")
+    parser.add_argument("--engines", default=None, help="comma separated (default: every installed engine)")
+    parser.add_argument("--emotions", default=",".join(BENCH_EMOTIONS), help="comma separated")
+    parser.add_argument("--repeat", type=int, default=1, help="clips per text / emotion / engine")
+    parser.add_argument("--json", dest="json_out", default="anih_tts_benchmark.json")
+    parser.add_argument("--elevenlabs-key", default=os.environ.get("ELEVENLABS_API_KEY"))
+    args = parser.parse_args(argv)
+    
+    engines = args.engines.split(",") if args.engines else [engine for engine, ok in TTS_ENGINES.items() if ok]
+    if "elevenlabs" in engines and not args.elevenlabs_key:
+        print("⚠️ Skipping elevenlabs (no --elevenlabs-key / ELEVENLABS_API_KEY)")
+        engines.remove("elevenlabs")
+    engines = [engine for engine in engines if TTS_ENGINES.get(engine)]
+    if not engines:
+        check_and_install_tts()
+        return 1
+    
+    voice = AnihVoice(preferred_engine=engines[0], elevenlabs_api_key=args.elevenlabs_key, player=False)
+    if args.elevenlabs_key and "elevenlabs" in engines:
+        set_api_key(args.elevenlabs_key)
+    
+    results = benchmark_engines(voice, engines, [emotion.strip() for emotion in args.emotions.split(",")],
+                                repeat=max(1, args.repeat))
+    print("\n" + format_benchmark(results))
+    with open(args.json_out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved: {args.json_out}")
+    return 0
+
+
 if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        sys.exit(benchmark_main(sys.argv[1:]))
+    
     print("""
 ╔══════════════════════════════════════════════════════════════╗
 ║              ANIH VOICE SYSTEM - TEST MODE                   ║